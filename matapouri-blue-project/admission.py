@@ -0,0 +1,213 @@
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, Optional
+
+from flask import jsonify, make_response
+from werkzeug.wsgi import ClosingIterator
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines run a single process
+    fcntl = None
+
+# Per-endpoint limits: concurrent runs across all workers, and a token bucket of
+# `rate` requests per second with bursts of up to `burst`
+LIMITS = {
+    'download-project': {'max_concurrent': 2, 'rate': 0.2, 'burst': 3},
+    'create-backup': {'max_concurrent': 1, 'rate': 0.1, 'burst': 2},
+    'push-to-github': {'max_concurrent': 1, 'rate': 1 / 30, 'burst': 1},
+    'create-booking': {'max_concurrent': 2, 'rate': 1 / 30, 'burst': 10},
+}
+
+# Retry-After sent when every concurrency slot is busy
+BUSY_RETRY_AFTER = 5
+
+
+def _pid_alive(pid: int) -> bool:
+    """True if a process with this pid exists; runs counted by a killed worker are then discarded"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AdmissionController:
+    """Concurrency caps and token-bucket rate limits shared by every worker through lock files"""
+
+    def __init__(self, state_dir: Optional[str] = None):
+        self.state_dir = state_dir or os.environ.get(
+            'ADMISSION_STATE_DIR', os.path.join(tempfile.gettempdir(), 'matapouri-admission'))
+        os.makedirs(self.state_dir, exist_ok=True)
+        self._thread_lock = threading.Lock()
+        self._local_slots = {}
+
+    @contextmanager
+    def _state(self, name: str):
+        """Read-modify-write the shared state file for an endpoint under an exclusive lock"""
+        path = os.path.join(self.state_dir, f"{name}.state")
+        with self._thread_lock, open(path, 'a+') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                state = json.loads(raw) if raw else {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _take_token(self, name: str, rate: float, burst: int) -> Optional[float]:
+        """Spend one token and count the run as active; returns None if admitted, else seconds until a token is available"""
+        now = time.time()
+        with self._state(name) as state:
+            tokens = state.get('tokens', float(burst))
+            updated = state.get('updated', now)
+            tokens = min(float(burst), tokens + (now - updated) * rate)
+            state['updated'] = now
+
+            if tokens >= 1:
+                state['tokens'] = tokens - 1
+                state['admitted'] = state.get('admitted', 0) + 1
+                self._adjust_active(state, 1)
+                return None
+
+            state['tokens'] = tokens
+            state['rejected_rate'] = state.get('rejected_rate', 0) + 1
+            return (1 - tokens) / rate
+
+    @staticmethod
+    def _adjust_active(state: Dict[str, Any], delta: int):
+        """Count a run in or out under this worker's pid, dropping counts left by dead workers"""
+        active = state.get('active')
+        if not isinstance(active, dict):
+            # Older state files kept a bare count, which can't tell whose runs are still going
+            active = {}
+        active = {pid: count for pid, count in active.items() if _pid_alive(int(pid))}
+        pid = str(os.getpid())
+        count = active.get(pid, 0) + delta
+        if count > 0:
+            active[pid] = count
+        else:
+            active.pop(pid, None)
+        state['active'] = active
+
+    def _finish(self, name: str):
+        """Count a run out once its response has been sent"""
+        with self._state(name) as state:
+            self._adjust_active(state, -1)
+
+    def _count(self, name: str, key: str):
+        """Increment a stats counter for an endpoint"""
+        with self._state(name) as state:
+            state[key] = state.get(key, 0) + 1
+
+    def _acquire_slot(self, name: str, max_concurrent: int):
+        """Hold one of max_concurrent slot locks, or return None if all are busy"""
+        if fcntl is None:
+            with self._thread_lock:
+                semaphore = self._local_slots.setdefault(name, threading.BoundedSemaphore(max_concurrent))
+            return semaphore if semaphore.acquire(blocking=False) else None
+
+        for i in range(max_concurrent):
+            f = open(os.path.join(self.state_dir, f"{name}.slot{i}"), 'a')
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return f
+            except BlockingIOError:
+                f.close()
+        return None
+
+    @staticmethod
+    def _release_slot(slot):
+        """Release a slot from _acquire_slot; closing the file drops its flock"""
+        if fcntl is None:
+            slot.release()
+        else:
+            slot.close()
+
+    def limit(self, name: str):
+        """Decorator applying LIMITS[name] to a route, answering 429 with Retry-After when over"""
+        config = LIMITS[name]
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # Take a slot before a token, so retries while busy don't drain the rate bucket
+                slot = self._acquire_slot(name, config['max_concurrent'])
+                if slot is None:
+                    self._count(name, 'rejected_concurrency')
+                    return self._reject('Server busy with this task, please try again shortly', BUSY_RETRY_AFTER)
+
+                try:
+                    retry_after = self._take_token(name, config['rate'], config['burst'])
+                except BaseException:
+                    self._release_slot(slot)
+                    raise
+                if retry_after is not None:
+                    self._release_slot(slot)
+                    return self._reject('Too many requests, please slow down', retry_after)
+
+                def finish():
+                    try:
+                        self._finish(name)
+                    finally:
+                        self._release_slot(slot)
+
+                try:
+                    response = make_response(view(*args, **kwargs))
+                except BaseException:
+                    finish()
+                    raise
+                # Streamed bodies (send_file) are still being sent after the view returns, so the
+                # slot is held until the server closes the response. Passthrough bodies are handed
+                # to the server as-is, skipping call_on_close, so the release rides on the body
+                if response.direct_passthrough:
+                    response.response = ClosingIterator(response.response, finish)
+                else:
+                    response.call_on_close(finish)
+                return response
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _reject(message: str, retry_after: float):
+        """429 response in the same JSON shape the endpoints use for errors"""
+        response = jsonify({'success': False, 'error': message})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Limits, counters and in-flight runs for every controlled endpoint"""
+        stats = {}
+        for name, config in LIMITS.items():
+            with self._state(name) as state:
+                self._adjust_active(state, 0)
+                counters = dict(state)
+            stats[name] = {
+                'limits': config,
+                'active': sum(counters['active'].values()),
+                'admitted': counters.get('admitted', 0),
+                'rejected_rate': counters.get('rejected_rate', 0),
+                'rejected_concurrency': counters.get('rejected_concurrency', 0),
+                'tokens': round(min(config['burst'], counters.get('tokens', config['burst'])
+                                    + (time.time() - counters.get('updated', time.time())) * config['rate']), 2),
+            }
+        return stats
+
+# Global admission controller instance
+admission = AdmissionController()
@@ -1,6 +1,6 @@
 import os
 import logging
-from flask import Flask, send_from_directory
+from flask import Flask
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -9,10 +9,37 @@ logging.basicConfig(level=logging.DEBUG)
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
 
-# Route to serve attached assets
+# Route to serve attached assets from a precomputed index (see asset_server.py)
 @app.route('/attached_assets/<path:filename>')
 def attached_assets(filename):
-    return send_from_directory('attached_assets', filename)
+    from asset_server import attached_assets_index
+    return attached_assets_index.serve(filename)
+
+# Stylesheet bundle used by base.html, falling back to the raw stylesheets if the build failed
+@app.context_processor
+def inject_css_bundle():
+    from css_pipeline import css_pipeline
+    return {'css_bundle': css_pipeline.get_manifest()}
+
+# Expose each template's JS bundles from asset_manifest.py to base.html
+from flask import before_render_template
+from asset_manifest import inject_template_bundles
+before_render_template.connect(inject_template_bundles, app)
+
+# Opt-in per-request profiling (see profiler.py)
+from profiler import profiler
+profiler.init_app(app)
+
+# gzip/brotli negotiation for HTML, CSS, JS and JSON responses (see compression.py)
+from compression import compressor
+compressor.init_app(app)
+
+# Build the merged, minified CSS bundle at startup
+from css_pipeline import css_pipeline
+css_pipeline.build()
+
+# Hash the attached assets at startup rather than on the first request for one
+from asset_server import attached_assets_index
 
 # Import routes after app creation to avoid circular imports
 from routes import *
@@ -0,0 +1,82 @@
+import hashlib
+import os
+from typing import Dict, Any
+
+from flask import url_for
+
+STATIC_DIR = 'static'
+
+LEAFLET_CSS = 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.css'
+LEAFLET_JS = 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.js'
+
+# JS bundles the templates can ask for. Lazy bundles are not loaded with the page; the lazy
+# loader fetches them once the container element scrolls into view.
+BUNDLES = {
+    'animations': {
+        'scripts': ['js/page-animations.js'],
+    },
+    'carousel': {
+        'scripts': ['js/carousel.js'],
+    },
+    'map': {
+        'styles': [LEAFLET_CSS],
+        'scripts': [LEAFLET_JS, 'js/kinloch-map.js'],
+        'lazy': True,
+        'container': '#map',
+    },
+}
+
+# Bundles each template needs; templates not listed get no page JS beyond base.html
+TEMPLATE_BUNDLES = {
+    'index.html': ['carousel'],
+    'discover.html': ['map'],
+    'about.html': ['animations'],
+    'check_availability.html': ['animations'],
+    'contact.html': ['animations'],
+    'how_to_book.html': ['animations'],
+}
+
+_file_versions = {}
+
+
+def asset_url(path: str) -> str:
+    """URL for a bundle file, with a content hash query string for local files"""
+    if path.startswith(('http://', 'https://')):
+        return path
+
+    full_path = os.path.join(STATIC_DIR, path)
+    try:
+        mtime = os.path.getmtime(full_path)
+    except OSError:
+        return url_for('static', filename=path)
+
+    cached = _file_versions.get(full_path)
+    if cached is None or cached[0] != mtime:
+        with open(full_path, 'rb') as f:
+            cached = (mtime, hashlib.sha256(f.read()).hexdigest()[:10])
+        _file_versions[full_path] = cached
+    return url_for('static', filename=path, v=cached[1])
+
+
+def bundles_for(template_name: str) -> Dict[str, Any]:
+    """Split a template's bundles into script URLs to load now and lazy bundles for the loader"""
+    scripts = []
+    lazy = {}
+    for name in TEMPLATE_BUNDLES.get(template_name, []):
+        bundle = BUNDLES[name]
+        if bundle.get('lazy'):
+            lazy[name] = {
+                'container': bundle['container'],
+                'styles': [asset_url(path) for path in bundle.get('styles', [])],
+                'scripts': [asset_url(path) for path in bundle['scripts']],
+            }
+        else:
+            scripts.extend(asset_url(path) for path in bundle['scripts'])
+    return {'scripts': scripts, 'lazy': lazy, 'loader': asset_url('js/lazy-loader.js') if lazy else None}
+
+
+def inject_template_bundles(sender, template, context, **extra):
+    """before_render_template handler exposing the rendering template's bundles to base.html"""
+    if 'js_bundles' not in context:
+        context['js_bundles'] = bundles_for(template.name)
+
@@ -0,0 +1,193 @@
+import mimetypes
+import os
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from flask import Response, abort, request
+from werkzeug.http import http_date, parse_date
+
+from gallery import file_hash
+
+# 'sendfile' streams from the worker (os.sendfile under gunicorn), 'x-accel' hands the
+# transfer to nginx via X-Accel-Redirect, 'x-sendfile' to Apache/lighttpd via X-Sendfile
+SERVE_MODES = ('sendfile', 'x-accel', 'x-sendfile')
+
+# Seconds between checks of the asset directory for added, removed or modified files
+INDEX_REFRESH_INTERVAL = 2.0
+
+# Read size when the WSGI server has no file wrapper (e.g. the Flask dev server)
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class AssetEntry(NamedTuple):
+    path: str
+    size: int
+    mtime: float
+    etag: str
+    content_type: str
+
+
+def read_range(path: str, start: int, stop: int):
+    """Yield bytes [start, stop) of a file"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = f.read(min(READ_BLOCK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class AssetIndex:
+    """In-memory index of a static directory answering conditional and Range requests without touching disk"""
+
+    def __init__(self, directory: str, serve_mode: Optional[str] = None):
+        self.directory = os.path.abspath(directory)
+        self.serve_mode = serve_mode or os.environ.get('ASSET_SERVE_MODE', 'sendfile')
+        if self.serve_mode not in SERVE_MODES:
+            raise ValueError(f"Unknown asset serve mode: {self.serve_mode}")
+        # nginx location marked `internal` that aliases the asset directory
+        self.accel_prefix = os.environ.get('ASSET_ACCEL_PREFIX', '/_protected/attached_assets/')
+        self.max_age = int(os.environ.get('ASSET_MAX_AGE', '3600'))
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._entries = {}
+        self._checked = 0.0
+        # Hash everything once at startup so no request pays for the first build
+        self.refresh()
+
+    def refresh(self):
+        """Rescan the directory, hashing only files whose size or mtime changed"""
+        entries = {}
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(dirpath, name)
+                key = os.path.relpath(path, self.directory).replace(os.sep, '/')
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+
+                previous = self._entries.get(key)
+                if previous and previous.size == st.st_size and previous.mtime == st.st_mtime:
+                    entries[key] = previous
+                    continue
+                try:
+                    etag = file_hash(path)[:32]
+                except OSError:
+                    continue
+                content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                entries[key] = AssetEntry(path, st.st_size, st.st_mtime, etag, content_type)
+
+        self._entries = entries
+        self._checked = time.monotonic()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Asset index refresh error: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def lookup(self, filename: str) -> Optional[AssetEntry]:
+        """Index entry for a request path; unknown paths (including ../ tricks) simply miss.
+
+        A stale index is answered from immediately while one background thread rescans,
+        so requests never wait on the directory walk or on hashing.
+        """
+        if time.monotonic() - self._checked > INDEX_REFRESH_INTERVAL:
+            with self._lock:
+                start = not self._refreshing and time.monotonic() - self._checked > INDEX_REFRESH_INTERVAL
+                if start:
+                    self._refreshing = True
+            if start:
+                threading.Thread(target=self._background_refresh, daemon=True).start()
+        return self._entries.get(filename)
+
+    def _not_modified(self, entry: AssetEntry) -> bool:
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(entry.etag)
+        since = request.headers.get('If-Modified-Since')
+        if since:
+            since_date = parse_date(since)
+            return since_date is not None and int(entry.mtime) <= since_date.timestamp()
+        return False
+
+    def _byte_range(self, entry: AssetEntry):
+        """(start, stop) for a satisfiable single Range, 'unsatisfiable', or None for the whole file"""
+        if request.range is None or request.range.units != 'bytes':
+            return None
+        if_range = request.headers.get('If-Range')
+        if if_range and if_range.strip('"') != entry.etag:
+            # The client's partial copy is stale: send the whole current file
+            return None
+        if len(request.range.ranges) != 1:
+            return None
+        byte_range = request.range.range_for_length(entry.size)
+        return byte_range if byte_range is not None else 'unsatisfiable'
+
+    def serve(self, filename: str) -> Response:
+        """Response for one asset: 304, 206, 416 or 200, transferred per the serve mode"""
+        entry = self.lookup(filename)
+        if entry is None:
+            abort(404)
+
+        headers = {
+            'ETag': f'"{entry.etag}"',
+            'Last-Modified': http_date(datetime.fromtimestamp(entry.mtime, timezone.utc)),
+            'Cache-Control': f"public, max-age={self.max_age}",
+            'Accept-Ranges': 'bytes',
+        }
+
+        if self._not_modified(entry):
+            return Response(status=304, headers=headers)
+
+        if self.serve_mode == 'x-accel':
+            # nginx applies Range and sends the file itself
+            headers['X-Accel-Redirect'] = self.accel_prefix + urllib.parse.quote(filename)
+            return Response(status=200, headers=headers, content_type=entry.content_type)
+        if self.serve_mode == 'x-sendfile':
+            headers['X-Sendfile'] = entry.path
+            return Response(status=200, headers=headers, content_type=entry.content_type)
+
+        byte_range = self._byte_range(entry)
+        if byte_range == 'unsatisfiable':
+            headers['Content-Range'] = f"bytes */{entry.size}"
+            return Response(status=416, headers=headers)
+
+        start, stop = byte_range or (0, entry.size)
+        status = 200
+        if byte_range is not None:
+            status = 206
+            headers['Content-Range'] = f"bytes {start}-{stop - 1}/{entry.size}"
+        headers['Content-Length'] = str(stop - start)
+
+        if request.method == 'HEAD':
+            return Response(status=status, headers=headers, content_type=entry.content_type)
+
+        file_wrapper = request.environ.get('wsgi.file_wrapper')
+        # Generic file wrappers read to EOF; gunicorn stops at Content-Length, so ranges are safe there
+        if file_wrapper is not None and (byte_range is None or
+                                         request.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn')):
+            # gunicorn sends a wrapped file positioned at `start` with os.sendfile, for exactly
+            # Content-Length bytes, so the body never passes through Python
+            f = open(entry.path, 'rb')
+            f.seek(start)
+            body = file_wrapper(f, READ_BLOCK_SIZE)
+        else:
+            body = read_range(entry.path, start, stop)
+
+        return Response(body, status=status, headers=headers, content_type=entry.content_type,
+                        direct_passthrough=True)
+
+# Global index of the photos and other files under attached_assets
+attached_assets_index = AssetIndex('attached_assets')
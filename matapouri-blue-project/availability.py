@@ -0,0 +1,305 @@
+import calendar
+import json
+import os
+import re
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines; only one process writes there
+    fcntl = None
+
+# Rooms that can be booked individually; 'entire' books all of them
+ROOMS = ('studio', 'suite', 'cottage')
+ENTIRE_PROPERTY = 'entire'
+
+# Limits on stays booked through the public form; longer or further-out stays go through the hosts
+MAX_STAY_NIGHTS = 30
+MAX_ADVANCE_DAYS = 548
+
+# Contact fields the booking form requires, and the longest value accepted for any detail
+REQUIRED_DETAILS = ('name', 'email', 'guests')
+MAX_DETAIL_LENGTH = 2000
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+class BookingConflict(Exception):
+    """Raised when a booking overlaps an existing stay"""
+
+
+class RoomSchedule:
+    """Sorted, non-overlapping stays for one room, stored as parallel arrays of day ordinals.
+
+    Because stays never overlap, both starts and ends are sorted, so conflict checks and
+    range lookups are a pair of binary searches.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+
+    def conflicts(self, start: int, end: int) -> bool:
+        """True if any stay overlaps the half-open range [start, end)"""
+        i = bisect_left(self.starts, end) - 1
+        return i >= 0 and self.ends[i] > start
+
+    def overlapping(self, start: int, end: int) -> range:
+        """Indexes of stays overlapping [start, end)"""
+        return range(bisect_right(self.ends, start), bisect_left(self.starts, end))
+
+    def add(self, start: int, end: int, booking_id: str):
+        """Insert a stay; the caller must have checked for conflicts"""
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, booking_id)
+
+    def remove(self, start: int, booking_id: str):
+        """Remove the stay starting on the given day"""
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.ids[i] == booking_id:
+                del self.starts[i], self.ends[i], self.ids[i]
+                return
+            i += 1
+
+
+def parse_date(value: str) -> date:
+    """Parse a YYYY-MM-DD date from the booking form"""
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid date: {value!r} (expected YYYY-MM-DD)")
+
+
+def rooms_for(accommodation: Optional[str]) -> List[str]:
+    """Rooms covered by an accommodation type from the booking form"""
+    if not accommodation or accommodation == ENTIRE_PROPERTY:
+        return list(ROOMS)
+    if accommodation not in ROOMS:
+        raise ValueError(f"Unknown accommodation type: {accommodation}")
+    return [accommodation]
+
+
+def validate_details(details: Dict[str, Any]) -> Dict[str, str]:
+    """Trimmed guest details, raising ValueError if a required field is missing or malformed"""
+    cleaned = {key: str(value if value is not None else '').strip() for key, value in details.items()}
+    missing = [key for key in REQUIRED_DETAILS if not cleaned.get(key)]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    if not EMAIL_PATTERN.match(cleaned['email']):
+        raise ValueError('Invalid email address')
+    too_long = [key for key, value in cleaned.items() if len(value) > MAX_DETAIL_LENGTH]
+    if too_long:
+        raise ValueError(f"Too long: {', '.join(too_long)}")
+    return cleaned
+
+
+class BookingCalendar:
+    """Holds reservations per room and answers availability queries"""
+
+    def __init__(self, bookings_file: str = 'bookings.json'):
+        self.bookings_file = bookings_file
+        self._lock = threading.Lock()
+        self._bookings = {}
+        self._schedules = {room: RoomSchedule() for room in ROOMS}
+        self._signature = None
+        self._loaded = False
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the thread lock and, where available, an flock shared by every worker process"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.bookings_file}.lock", 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _ensure_loaded(self):
+        """(Re)load saved bookings if the file changed since it was last read, e.g. by another worker"""
+        try:
+            st = os.stat(self.bookings_file)
+            signature = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            signature = None
+
+        if self._loaded and signature == self._signature:
+            return
+
+        self._bookings = {}
+        self._schedules = {room: RoomSchedule() for room in ROOMS}
+        self._signature = signature
+        self._loaded = True
+        if signature is None:
+            return
+        try:
+            with open(self.bookings_file, 'r', encoding='utf-8') as f:
+                for booking in json.load(f):
+                    self._index(booking)
+        except Exception as e:
+            print(f"Booking load error: {e}")
+
+    def _index(self, booking: Dict[str, Any]):
+        """Add a booking record to the per-room schedules"""
+        start = date.fromisoformat(booking['checkin']).toordinal()
+        end = date.fromisoformat(booking['checkout']).toordinal()
+        self._bookings[booking['id']] = booking
+        for room in booking['rooms']:
+            self._schedules[room].add(start, end, booking['id'])
+
+    def _save(self):
+        """Write all bookings to disk atomically"""
+        tmp_file = f"{self.bookings_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(sorted(self._bookings.values(), key=lambda b: b['checkin']), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.bookings_file)
+        st = os.stat(self.bookings_file)
+        self._signature = (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _range(checkin: str, checkout: str) -> Tuple[int, int]:
+        """Validate a stay and return it as (start, end) day ordinals"""
+        start = parse_date(checkin)
+        end = parse_date(checkout)
+        if end <= start:
+            raise ValueError('Check-out must be after check-in')
+        return start.toordinal(), end.toordinal()
+
+    @classmethod
+    def _bookable_range(cls, checkin: str, checkout: str) -> Tuple[int, int]:
+        """_range, additionally limited to future stays of at most MAX_STAY_NIGHTS within MAX_ADVANCE_DAYS"""
+        start, end = cls._range(checkin, checkout)
+        today = date.today().toordinal()
+        if start < today:
+            raise ValueError('Check-in cannot be in the past')
+        if start > today + MAX_ADVANCE_DAYS:
+            raise ValueError(f"Bookings can be made at most {MAX_ADVANCE_DAYS} days ahead")
+        if end - start > MAX_STAY_NIGHTS:
+            raise ValueError(f"Stays are limited to {MAX_STAY_NIGHTS} nights; please contact us for longer stays")
+        return start, end
+
+    def check_availability(self, checkin: str, checkout: str,
+                           accommodation: Optional[str] = None) -> Dict[str, bool]:
+        """Map each requested room to whether it is free for the whole stay"""
+        start, end = self._range(checkin, checkout)
+        rooms = rooms_for(accommodation)
+        with self._lock:
+            self._ensure_loaded()
+            return {room: not self._schedules[room].conflicts(start, end) for room in rooms}
+
+    def create_booking(self, checkin: str, checkout: str, accommodation: str,
+                       details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Reserve the requested rooms, raising BookingConflict if any night is taken"""
+        start, end = self._bookable_range(checkin, checkout)
+        if not accommodation:
+            raise ValueError('Please choose the accommodation to book')
+        rooms = rooms_for(accommodation)
+        details = validate_details(details or {})
+
+        # Conflict check and save happen under the cross-process lock against the latest file
+        with self._exclusive():
+            self._ensure_loaded()
+            taken = [room for room in rooms if self._schedules[room].conflicts(start, end)]
+            if taken:
+                raise BookingConflict(f"Not available for those dates: {', '.join(taken)}")
+
+            booking = dict(details)
+            booking.update({
+                'id': uuid.uuid4().hex,
+                'checkin': date.fromordinal(start).isoformat(),
+                'checkout': date.fromordinal(end).isoformat(),
+                'accommodation': accommodation,
+                'rooms': rooms,
+                'created': datetime.utcnow().isoformat(),
+            })
+            self._index(booking)
+            self._save()
+            return booking
+
+    def cancel_booking(self, booking_id: str) -> bool:
+        """Remove a booking, returning False if it does not exist"""
+        with self._exclusive():
+            self._ensure_loaded()
+            booking = self._bookings.pop(booking_id, None)
+            if booking is None:
+                return False
+            start = date.fromisoformat(booking['checkin']).toordinal()
+            for room in booking['rooms']:
+                self._schedules[room].remove(start, booking_id)
+            self._save()
+            return True
+
+    def month_view(self, year: int, month: int, accommodation: Optional[str] = None) -> Dict[str, Any]:
+        """Per-day list of booked rooms for one calendar month"""
+        rooms = rooms_for(accommodation)
+        first = date(year, month, 1)
+        days_in_month = calendar.monthrange(year, month)[1]
+        start = first.toordinal()
+        end = start + days_in_month
+
+        booked = [[] for _ in range(days_in_month)]
+        with self._lock:
+            self._ensure_loaded()
+            for room in rooms:
+                schedule = self._schedules[room]
+                for i in schedule.overlapping(start, end):
+                    for day in range(max(start, schedule.starts[i]), min(end, schedule.ends[i])):
+                        booked[day - start].append(room)
+
+        return {
+            'year': year,
+            'month': month,
+            'rooms': rooms,
+            'days': [
+                {
+                    'date': (first + timedelta(days=offset)).isoformat(),
+                    'booked': booked[offset],
+                    'available': [room for room in rooms if room not in booked[offset]],
+                }
+                for offset in range(days_in_month)
+            ],
+        }
+
+    def export_ical(self, accommodation: Optional[str] = None) -> str:
+        """iCalendar feed of booked stays, without guest details, for syncing with booking sites"""
+        rooms = set(rooms_for(accommodation))
+        with self._lock:
+            self._ensure_loaded()
+            bookings = sorted(self._bookings.values(), key=lambda b: b['checkin'])
+
+        lines = [
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            'PRODID:-//Matapouri Blue//Availability//EN',
+            'CALSCALE:GREGORIAN',
+        ]
+        for booking in bookings:
+            booked_rooms = [room for room in booking['rooms'] if room in rooms]
+            if not booked_rooms:
+                continue
+            created = datetime.fromisoformat(booking['created']).strftime('%Y%m%dT%H%M%SZ')
+            lines.extend([
+                'BEGIN:VEVENT',
+                f"UID:{booking['id']}@matapouriblue",
+                f"DTSTAMP:{created}",
+                f"DTSTART;VALUE=DATE:{booking['checkin'].replace('-', '')}",
+                f"DTEND;VALUE=DATE:{booking['checkout'].replace('-', '')}",
+                f"SUMMARY:Booked - {', '.join(booked_rooms)}",
+                'END:VEVENT',
+            ])
+        lines.append('END:VCALENDAR')
+        return '\r\n'.join(lines) + '\r\n'
+
+# Global booking calendar instance
+booking_calendar = BookingCalendar()
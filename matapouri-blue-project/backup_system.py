@@ -1,13 +1,66 @@
+import difflib
 import json
 import os
+import re
+import shutil
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+from profiler import profiler
+from snapshot_archive import SnapshotReader, SnapshotWriter
+
+# Snapshot storage modes: 'full' writes every snapshot in full, 'delta' keeps the newest
+# snapshot in full and rewrites older ones as reverse deltas against the next newer one,
+# 'archive' streams each snapshot into an indexed .snap file for random-access reads
+STORAGE_MODES = ('full', 'delta', 'archive')
+
+# Key project files included in full_project snapshots
+PROJECT_FILES = [
+    'app.py',
+    'routes.py',
+    'models.py',
+    'static/css/style.css',
+    'templates/index.html',
+    'templates/base.html',
+    'static/philosophy_content.json'
+]
+
+# Every Nth snapshot in a delta chain is kept in full so reconstruction depth stays bounded
+KEYFRAME_INTERVAL = 10
+
+SNAPSHOT_PATTERN = re.compile(r'^(?P<type>[a-z_]+?)_(?:(?P<delta>delta)_)?(?P<ts>\d{8}_\d{6}(?:_\d{6})?)\.(?P<ext>json|snap)$')
+
+
+def line_delta(base: str, target: str) -> List[list]:
+    """Line-level edit script that turns base into target, as [start, end, replacement_lines] ops"""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    return [
+        [i1, i2, target_lines[j1:j2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def apply_line_delta(base: str, ops: List[list]) -> str:
+    """Apply ops from line_delta to base"""
+    lines = base.splitlines(keepends=True)
+    for start, end, replacement in reversed(ops):
+        lines[start:end] = replacement
+    return ''.join(lines)
+
 
 class BackupManager:
     """Manages file-based backup system for Vercel deployment"""
     
-    def __init__(self):
+    def __init__(self, storage_mode: Optional[str] = None):
         self.file_backup_dir = "backups"
+        self.storage_mode = storage_mode or os.environ.get('BACKUP_STORAGE_MODE', 'full')
+        if self.storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown backup storage mode: {self.storage_mode}")
+        # Incremental snapshots beyond this many are deleted, oldest first
+        self.incremental_keep = int(os.environ.get('BACKUP_INCREMENTAL_KEEP', '100'))
         self.ensure_backup_dir()
     
     def ensure_backup_dir(self):
@@ -15,6 +68,7 @@ class BackupManager:
         if not os.path.exists(self.file_backup_dir):
             os.makedirs(self.file_backup_dir)
     
+    @profiler.profiled('BackupManager.backup_philosophy_content')
     def backup_philosophy_content(self, title: str, text1: str, text2: str) -> bool:
         """Backup philosophy content to file"""
         content = {
@@ -28,8 +82,12 @@ class BackupManager:
         # File backup only
         return self._backup_to_file('philosophy_content', content)
     
+    @profiler.profiled('BackupManager.backup_project_files')
     def backup_project_files(self) -> bool:
         """Create a complete backup of project files"""
+        if self.storage_mode == 'archive':
+            return self._backup_to_archive('full_project', PROJECT_FILES)
+
         try:
             backup_data = {
                 'timestamp': datetime.utcnow().isoformat(),
@@ -38,38 +96,263 @@ class BackupManager:
             }
             
             # Backup key project files
-            important_files = [
-                'app.py',
-                'routes.py',
-                'models.py',
-                'static/css/style.css',
-                'templates/index.html',
-                'templates/base.html',
-                'static/philosophy_content.json'
-            ]
-            
-            for file_path in important_files:
+            for file_path in PROJECT_FILES:
                 if os.path.exists(file_path):
                     with open(file_path, 'r', encoding='utf-8') as f:
                         backup_data['files'][file_path] = f.read()
             
             # Save to file
+            if self.storage_mode == 'delta':
+                return self._backup_with_reverse_delta('full_project', backup_data)
             return self._backup_to_file('full_project', backup_data)
             
         except Exception as e:
             print(f"Project backup error: {e}")
             return False
-    
+
+    @profiler.profiled('BackupManager.backup_content_database')
+    def backup_content_database(self) -> bool:
+        """Snapshot the content database alongside the file backups"""
+        from content_store import content_database
+        if content_database is None:
+            return True
+
+        try:
+            timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+            extension = 'json' if content_database.is_postgres else 'db'
+            filename = f"content_db_{timestamp}.{extension}"
+            content_database.snapshot(os.path.join(self.file_backup_dir, filename))
+            print(f"Content database backup successful: {filename}")
+            return True
+        except Exception as e:
+            print(f"Content database backup error: {e}")
+            return False
+
+    @profiler.profiled('BackupManager.backup_changed_files')
+    def backup_changed_files(self, file_paths: List[str]) -> bool:
+        """Create an incremental snapshot holding only the given changed files"""
+        try:
+            backup_data = {
+                'timestamp': datetime.utcnow().isoformat(),
+                'backup_type': 'incremental_project',
+                'files': {},
+                'deleted': []
+            }
+
+            for file_path in file_paths:
+                if not os.path.exists(file_path):
+                    backup_data['deleted'].append(file_path)
+                    continue
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        backup_data['files'][file_path] = f.read()
+                except UnicodeDecodeError:
+                    # Binary assets are covered by full backups, not incremental ones
+                    continue
+
+            if not backup_data['files'] and not backup_data['deleted']:
+                return True
+
+            if not self._backup_to_file('incremental_project', backup_data, precise=True):
+                return False
+            self._prune_snapshots('incremental_project', self.incremental_keep)
+            return True
+
+        except Exception as e:
+            print(f"Incremental backup error: {e}")
+            return False
+
+    def _prune_snapshots(self, backup_type: str, keep: int):
+        """Delete the oldest timestamped snapshots of a type beyond the newest `keep`"""
+        snapshots = self.list_project_snapshots(backup_type)
+        for snapshot in snapshots[:max(0, len(snapshots) - keep)]:
+            try:
+                os.remove(os.path.join(self.file_backup_dir, snapshot['filename']))
+            except FileNotFoundError:
+                pass
+
+    def list_project_snapshots(self, backup_type: str = 'full_project') -> List[Dict[str, Any]]:
+        """List timestamped snapshots oldest first, noting which are stored as deltas or archives"""
+        snapshots = []
+        try:
+            for filename in os.listdir(self.file_backup_dir):
+                match = SNAPSHOT_PATTERN.match(filename)
+                if match and match.group('type') == backup_type:
+                    snapshots.append({
+                        'filename': filename,
+                        'timestamp': match.group('ts'),
+                        'delta': bool(match.group('delta')),
+                        'archive': match.group('ext') == 'snap',
+                    })
+        except Exception as e:
+            print(f"Error listing snapshots: {e}")
+        return sorted(snapshots, key=lambda snapshot: snapshot['timestamp'])
+
+    @profiler.profiled('BackupManager.restore_project_snapshot')
+    def restore_project_snapshot(self, timestamp: Optional[str] = None,
+                                 backup_type: str = 'full_project') -> Optional[Dict[str, Any]]:
+        """Rebuild a snapshot by timestamp (YYYYMMDD_HHMMSS); the latest is read directly"""
+        if timestamp is None:
+            return self._restore_from_file(backup_type)
+
+        try:
+            archive_file = os.path.join(self.file_backup_dir, f"{backup_type}_{timestamp}.snap")
+            if os.path.exists(archive_file):
+                return self._read_archive(archive_file)
+
+            # Walk forward through reverse deltas to the nearest full snapshot, then undo them in turn
+            chain = []
+            while True:
+                full_file = os.path.join(self.file_backup_dir, f"{backup_type}_{timestamp}.json")
+                if os.path.exists(full_file):
+                    with open(full_file, 'r', encoding='utf-8') as f:
+                        snapshot = json.load(f)
+                    break
+
+                delta_file = os.path.join(self.file_backup_dir, f"{backup_type}_delta_{timestamp}.json")
+                if not os.path.exists(delta_file):
+                    return None
+                with open(delta_file, 'r', encoding='utf-8') as f:
+                    delta = json.load(f)
+                chain.append(delta)
+                timestamp = delta['base']
+
+            for delta in reversed(chain):
+                snapshot = self._apply_reverse_delta(snapshot, delta)
+            return snapshot
+        except Exception as e:
+            print(f"Snapshot restore error: {e}")
+            return None
+
+    def _make_reverse_delta(self, newer: Dict[str, Any], older: Dict[str, Any], base_timestamp: str) -> Dict[str, Any]:
+        """Describe older as line-level edits against newer"""
+        newer_files = newer.get('files', {})
+        older_files = older.get('files', {})
+        files = {}
+        for path in set(newer_files) | set(older_files):
+            if path not in older_files:
+                files[path] = {'removed': True}
+            elif path not in newer_files:
+                files[path] = {'text': older_files[path]}
+            elif older_files[path] != newer_files[path]:
+                files[path] = {'ops': line_delta(newer_files[path], older_files[path])}
+
+        delta = {key: value for key, value in older.items() if key != 'files'}
+        delta.update({'storage': 'reverse_delta', 'base': base_timestamp, 'files': files})
+        return delta
+
+    def _apply_reverse_delta(self, newer: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+        """Rebuild the older snapshot described by a reverse delta"""
+        files = dict(newer.get('files', {}))
+        for path, change in delta['files'].items():
+            if change.get('removed'):
+                files.pop(path, None)
+            elif 'text' in change:
+                files[path] = change['text']
+            else:
+                files[path] = apply_line_delta(files[path], change['ops'])
+
+        snapshot = {key: value for key, value in delta.items() if key not in ('storage', 'base', 'files')}
+        snapshot['files'] = files
+        return snapshot
+
+    def _backup_with_reverse_delta(self, backup_type: str, content: Dict[str, Any]) -> bool:
+        """Write a new full snapshot, then shrink the previous newest snapshot to a reverse delta"""
+        if not self._backup_to_file(backup_type, content):
+            return False
+
+        snapshots = [snapshot for snapshot in self.list_project_snapshots(backup_type) if not snapshot['archive']]
+        if len(snapshots) < 2 or snapshots[-2]['delta']:
+            return True
+        newest, previous = snapshots[-1], snapshots[-2]
+
+        # Keep a full keyframe once the run of deltas behind it reaches the interval
+        run = 0
+        for snapshot in reversed(snapshots[:-2]):
+            if not snapshot['delta']:
+                break
+            run += 1
+        if run >= KEYFRAME_INTERVAL - 1:
+            return True
+
+        try:
+            previous_file = os.path.join(self.file_backup_dir, previous['filename'])
+            with open(previous_file, 'r', encoding='utf-8') as f:
+                older = json.load(f)
+
+            delta = self._make_reverse_delta(content, older, newest['timestamp'])
+            delta_file = os.path.join(self.file_backup_dir, f"{backup_type}_delta_{previous['timestamp']}.json")
+            with open(delta_file, 'w', encoding='utf-8') as f:
+                json.dump(delta, f, indent=2, ensure_ascii=False)
+            os.remove(previous_file)
+
+            print(f"Stored {previous['filename']} as reverse delta")
+        except Exception as e:
+            # The previous snapshot is still intact in full, so the backup itself succeeded
+            print(f"Reverse delta error: {e}")
+        return True
+
+    def _backup_to_archive(self, backup_type: str, file_paths: List[str]) -> bool:
+        """Stream files into an indexed snapshot archive without holding them all in memory"""
+        try:
+            timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+            filename = f"{backup_type}_{timestamp}.snap"
+            file_path = os.path.join(self.file_backup_dir, filename)
+
+            metadata = {'timestamp': datetime.utcnow().isoformat(), 'backup_type': backup_type}
+            with SnapshotWriter(file_path, metadata) as writer:
+                for source_path in file_paths:
+                    if os.path.exists(source_path):
+                        writer.add_file(source_path, source_path)
+
+            # Also update the latest backup
+            latest_file = os.path.join(self.file_backup_dir, f"{backup_type}_latest.snap")
+            shutil.copyfile(file_path, f"{latest_file}.tmp")
+            os.replace(f"{latest_file}.tmp", latest_file)
+
+            print(f"Archive backup successful: {filename}")
+            return True
+
+        except Exception as e:
+            print(f"Archive backup error: {e}")
+            return False
+
+    @profiler.profiled('BackupManager.extract_snapshot_file')
+    def extract_snapshot_file(self, snapshot_name: str, file_path: str) -> Optional[bytes]:
+        """Read one file from a .snap archive in the backup directory without unpacking the rest"""
+        try:
+            archive_path = os.path.join(self.file_backup_dir, os.path.basename(snapshot_name))
+            with SnapshotReader(archive_path) as reader:
+                return reader.read(file_path)
+        except KeyError:
+            return None
+        except Exception as e:
+            print(f"Snapshot extract error: {e}")
+            return None
+
+    def _read_archive(self, archive_path: str) -> Dict[str, Any]:
+        """Load a .snap archive into the same shape as a JSON snapshot"""
+        with SnapshotReader(archive_path) as reader:
+            snapshot = {key: value for key, value in reader.index.items() if key != 'files'}
+            snapshot['files'] = {name: reader.read(name).decode('utf-8') for name in reader.files}
+        return snapshot
+
     def restore_philosophy_content(self) -> Optional[Dict[str, Any]]:
         """Restore philosophy content from file backup"""
         return self._restore_from_file('philosophy_content')
     
-    def _backup_to_file(self, backup_type: str, content: Dict[str, Any]) -> bool:
-        """Backup content to JSON file"""
+    def _backup_to_file(self, backup_type: str, content: Dict[str, Any], precise: bool = False) -> bool:
+        """Backup content to JSON file; precise names carry microseconds for snapshots taken in quick succession"""
         try:
-            timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+            timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f' if precise else '%Y%m%d_%H%M%S')
             filename = f"{backup_type}_{timestamp}.json"
             file_path = os.path.join(self.file_backup_dir, filename)
+            if precise:
+                # Never overwrite an earlier snapshot, even if the clock hasn't moved
+                while os.path.exists(file_path):
+                    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')
+                    filename = f"{backup_type}_{timestamp}.json"
+                    file_path = os.path.join(self.file_backup_dir, filename)
             
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(content, f, indent=2, ensure_ascii=False)
@@ -89,18 +372,27 @@ class BackupManager:
 
     
     def _restore_from_file(self, backup_type: str) -> Optional[Dict[str, Any]]:
-        """Restore content from file backup"""
+        """Restore content from the newest latest backup, whether written as JSON or as an archive"""
         try:
-            latest_file = os.path.join(self.file_backup_dir, f"{backup_type}_latest.json")
-            if os.path.exists(latest_file):
-                with open(latest_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            candidates = [
+                os.path.join(self.file_backup_dir, f"{backup_type}_latest.{ext}") for ext in ('json', 'snap')
+            ]
+            candidates = [path for path in candidates if os.path.exists(path)]
+            if not candidates:
+                return None
+            # Both exist after the storage mode has been switched; the more recently written one wins
+            latest_file = max(candidates, key=os.path.getmtime)
+            if latest_file.endswith('.snap'):
+                return self._read_archive(latest_file)
+            with open(latest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
         except Exception as e:
             print(f"File restore error: {e}")
         return None
     
 
     
+    @profiler.profiled('BackupManager.list_backups')
     def list_backups(self) -> Dict[str, Any]:
         """List all available file backups"""
         backups = {
@@ -111,7 +403,7 @@ class BackupManager:
         try:
             if os.path.exists(self.file_backup_dir):
                 files = os.listdir(self.file_backup_dir)
-                backups['file_backups'] = [f for f in files if f.endswith('.json')]
+                backups['file_backups'] = [f for f in files if f.endswith(('.json', '.snap', '.db'))]
         except Exception as e:
             print(f"Error listing file backups: {e}")
         
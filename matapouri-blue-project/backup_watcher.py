@@ -0,0 +1,229 @@
+# Continuous backup service: watches the project tree and writes an incremental snapshot of
+# the files that changed, batching bursts of edits (an /apply-css call, an editor save, a git
+# checkout) into one snapshot. Run it as a single process next to the web workers:
+#
+#     python backup_watcher.py
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Dict, Optional, Set, Tuple
+
+# Directories whose contents are never backed up incrementally
+IGNORED_DIRS = {'.git', '__pycache__', 'backups', 'tile_cache', 'node_modules', '.venv', 'venv'}
+
+# Only text files are captured; binary assets are covered by full backups
+WATCHED_EXTENSIONS = ('.py', '.html', '.css', '.js', '.json', '.md', '.toml')
+
+IGNORED_SUFFIXES = ('.tmp', '.lock', 'bundle-manifest.json')
+
+# Runtime data written by the app rather than edited project files (guest details, caches)
+# must not be copied into backups/, which /push-to-github publishes
+IGNORED_FILES = {
+    'bookings.json',
+    'gallery_cache.json',
+}
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_watched_file(path: str) -> bool:
+    """True for files the incremental backup should capture"""
+    name = os.path.basename(path)
+    if name in IGNORED_FILES or name.startswith('.') or name.endswith(IGNORED_SUFFIXES):
+        return False
+    if name.startswith('bundle.') and name.endswith('.css'):
+        return False
+    return name.endswith(WATCHED_EXTENSIONS)
+
+
+def walk_project(root: str):
+    """Yield (dirpath, filenames) for every directory that is not ignored"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS and not d.startswith('.')]
+        yield dirpath, filenames
+
+
+class InotifySource:
+    """Recursive inotify watch on the project tree via libc"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watches = {}
+        for dirpath, _ in walk_project(root):
+            self._add_watch(dirpath)
+
+    def _add_watch(self, path: str):
+        """Watch one directory"""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self.watches[wd] = path
+
+    def _rescan(self, root: str) -> Set[str]:
+        """Watch every directory under root and return all of its files"""
+        found = set()
+        for dirpath, filenames in walk_project(root):
+            self._add_watch(dirpath)
+            found.update(os.path.join(dirpath, f) for f in filenames)
+        return found
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Block until events arrive (or timeout) and return the changed file paths"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped (wd is -1), so any file may have changed unseen; capture them all
+                print('Backup watcher: inotify queue overflowed, rescanning the project')
+                changed.update(self._rescan(self.root))
+                continue
+
+            directory = self.watches.get(wd)
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            if directory is None or not name:
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and name not in IGNORED_DIRS:
+                    # Watch new directories and pick up files created before the watch was added
+                    changed.update(self._rescan(path))
+                continue
+            changed.add(path)
+
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    """Fallback for platforms without inotify: compares mtimes on a fixed interval"""
+
+    def __init__(self, root: str, interval: float = 5.0):
+        self.root = root
+        self.interval = interval
+        self.state = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Current (mtime, size) of every watched file"""
+        state = {}
+        for dirpath, filenames in walk_project(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                state[path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Sleep one interval (or less if a batch is due) and return files that changed"""
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        new_state = self._scan()
+        changed = {path for path, sig in new_state.items() if self.state.get(path) != sig}
+        changed.update(path for path in self.state if path not in new_state)
+        self.state = new_state
+        return changed
+
+    def close(self):
+        pass
+
+
+class BackupWatcher:
+    """Feeds batches of changed project files into incremental BackupManager snapshots"""
+
+    def __init__(self, root: str = '.', batch_window: float = 2.0, force_polling: bool = False):
+        self.root = root
+        self.batch_window = batch_window
+        self.source = None
+        if not force_polling:
+            try:
+                self.source = InotifySource(root)
+                print(f"Backup watcher: using inotify on {len(self.source.watches)} directories")
+            except (OSError, AttributeError) as e:
+                print(f"Backup watcher: inotify unavailable ({e}), polling instead")
+        if self.source is None:
+            self.source = PollingSource(root)
+
+    def _relative(self, path: str) -> str:
+        """Project-relative path, matching the keys used by full backups"""
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def run_once(self, timeout: Optional[float] = None) -> Set[str]:
+        """Collect one batch of changes, back it up, and return the backed-up paths"""
+        pending = {p for p in self.source.wait(timeout) if is_watched_file(p)}
+        if not pending:
+            return set()
+
+        # Keep collecting until the batch window closes so a burst becomes one snapshot
+        deadline = time.monotonic() + self.batch_window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            pending.update(p for p in self.source.wait(remaining) if is_watched_file(p))
+
+        from backup_system import backup_manager
+        paths = sorted(self._relative(p) for p in pending)
+        if backup_manager.backup_changed_files(paths):
+            print(f"Backup watcher: captured {len(paths)} changed file(s)")
+        return set(paths)
+
+    def run(self):
+        """Watch until interrupted"""
+        try:
+            while True:
+                self.run_once()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.source.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Continuously back up changed project files')
+    parser.add_argument('--window', type=float, default=2.0, help='seconds to batch changes for')
+    parser.add_argument('--poll', action='store_true', help='use polling instead of inotify')
+    args = parser.parse_args()
+
+    BackupWatcher(batch_window=args.window, force_polling=args.poll).run()
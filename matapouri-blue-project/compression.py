@@ -0,0 +1,192 @@
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Only text formats are worth compressing; images, zips and fonts are already compressed
+COMPRESSIBLE_TYPES = {
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/javascript',
+    'text/calendar',
+    'application/javascript',
+    'application/json',
+    'application/geo+json',
+    'application/xml',
+    'image/svg+xml',
+}
+
+# Static files larger than this are passed through rather than buffered for compression
+MAX_PASSTHROUGH_BYTES = 1024 * 1024
+
+
+class Compressor:
+    """Negotiates gzip/brotli per request and keeps recently compressed bodies in an LRU"""
+
+    def __init__(self):
+        self.min_size = int(os.environ.get('COMPRESSION_MIN_SIZE', '500'))
+        self.gzip_level = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+        self.brotli_quality = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+        self.max_cache_bytes = int(float(os.environ.get('COMPRESSION_CACHE_MB', '16')) * 1024 * 1024)
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def choose_encoding(self, accept_encodings) -> Optional[str]:
+        """Best encoding the client accepts, preferring brotli when it is installed"""
+        if brotli is not None and accept_encodings.quality('br') > 0:
+            return 'br'
+        if accept_encodings.quality('gzip') > 0:
+            return 'gzip'
+        return None
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def compress_stream(self, chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+        """Compress a streamed body chunk by chunk, flushing so each chunk reaches the client"""
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            for chunk in chunks:
+                output = compressor.process(chunk) + compressor.flush()
+                if output:
+                    yield output
+            yield compressor.finish()
+            return
+
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            output = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if output:
+                yield output
+        yield compressor.flush()
+
+    def _cached(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            data = self._cache.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def _store(self, key: tuple, data: bytes):
+        if len(data) > self.max_cache_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = data
+            self._cache_bytes += len(data)
+            while self._cache_bytes > self.max_cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    def _should_compress(self, response) -> bool:
+        if response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return False
+        if 'no-transform' in response.headers.get('Cache-Control', ''):
+            return False
+        return response.mimetype in COMPRESSIBLE_TYPES
+
+    def process(self, req, response):
+        """after_request hook: compress eligible responses for clients that accept it"""
+        if not self._should_compress(response):
+            return response
+
+        # Caches must store a separate copy per encoding, whichever one this client gets
+        response.vary.add('Accept-Encoding')
+        if req.method == 'HEAD':
+            return response
+
+        encoding = self.choose_encoding(req.accept_encodings)
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        level = self.brotli_quality if encoding == 'br' else self.gzip_level
+
+        if response.direct_passthrough:
+            # send_file responses (static CSS/JS): buffer small files; their ETag tracks mtime and size
+            if response.content_length is None or response.content_length > MAX_PASSTHROUGH_BYTES:
+                return response
+            if response.content_length < self.min_size:
+                return response
+            if etag:
+                cached = self._cached(('etag', etag, encoding, level))
+                if cached is not None:
+                    source = response.response
+                    if hasattr(source, 'close'):
+                        response.call_on_close(source.close)
+                    response.direct_passthrough = False
+                    return self._finish(response, cached, encoding, etag, weak)
+            response.direct_passthrough = False
+        elif response.is_streamed:
+            response.response = self.compress_stream(response.iter_encoded(), encoding)
+            response.headers.pop('Content-Length', None)
+            response.headers.pop('Accept-Ranges', None)
+            response.headers['Content-Encoding'] = encoding
+            if etag and not weak:
+                response.set_etag(etag, weak=True)
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        key = ('etag', etag, encoding, level) if etag else ('body', hashlib.sha1(body).digest(), encoding, level)
+        compressed = self._cached(key)
+        if compressed is None:
+            compressed = self.compress(body, encoding)
+            self._store(key, compressed)
+        return self._finish(response, compressed, encoding, etag, weak)
+
+    @staticmethod
+    def _finish(response, compressed: bytes, encoding: str, etag: Optional[str], weak: bool):
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        # Byte ranges would refer to the identity body, not these bytes
+        response.headers.pop('Accept-Ranges', None)
+        # The encoded bytes differ from the identity body, so a strong validator must be weakened;
+        # If-None-Match uses weak comparison, so conditional GETs still get 304s
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'brotli_available': brotli is not None,
+                'gzip_level': self.gzip_level,
+                'brotli_quality': self.brotli_quality,
+                'min_size': self.min_size,
+                'cache_entries': len(self._cache),
+                'cache_bytes': self._cache_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def init_app(self, app):
+        """Register the after_request hook that compresses responses"""
+        from flask import request
+
+        @app.after_request
+        def _compress_response(response):
+            return self.process(request, response)
+
+# Global response compressor instance
+compressor = Compressor()
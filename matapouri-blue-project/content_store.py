@@ -0,0 +1,458 @@
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines; only one process writes there
+    fcntl = None
+
+try:
+    import psycopg2
+    import psycopg2.pool
+except ImportError:  # only needed when CONTENT_DATABASE_URL points at Postgres
+    psycopg2 = None
+
+# Where editable content lives: sqlite:///<path>, postgresql://..., or 'json' for the
+# original one-file-per-document storage
+CONTENT_DATABASE_URL = os.environ.get('CONTENT_DATABASE_URL', 'sqlite:///content.db')
+CONTENT_POOL_SIZE = int(os.environ.get('CONTENT_POOL_SIZE', '5'))
+
+# Pages copied per step of an online backup; readers and writers proceed between steps
+SNAPSHOT_PAGES = 256
+
+# Lookups by document name go through the primary-key index
+CONTENT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_documents (
+    name TEXT PRIMARY KEY,
+    body TEXT NOT NULL,
+    version TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+)
+"""
+
+PHILOSOPHY_DEFAULTS = {
+    'title': 'Our name, our philosophy',
+    'text1': 'Inspired by the philosophy of Japanese Bonsai, the Matapouri Blue Totara found on our land, and the deep blue of the lake, our name and place reflect the values we hold dear.',
+    'text2': 'Life isn\'t always easy—but with strong roots, a sense of direction, and the courage to shape new growth, we believe each person can define their own path and future.'
+}
+
+
+class VersionConflict(Exception):
+    """Raised when a write is based on a version that is no longer current"""
+
+    def __init__(self, current_version: str, current_content: Dict[str, Any]):
+        super().__init__(f"Content has changed (current version {current_version})")
+        self.current_version = current_version
+        self.current_content = current_content
+
+
+def content_version(content: Dict[str, Any]) -> str:
+    """Version tag for a document: a hash of its canonical JSON form"""
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def apply_text_patch(text: str, ops: List[list]) -> str:
+    """Apply [start, end, replacement] ops, given against the original text in ascending order"""
+    result = []
+    position = 0
+    for op in ops:
+        if not isinstance(op, (list, tuple)) or len(op) != 3:
+            raise ValueError('Each patch op must be [start, end, replacement]')
+        start, end, replacement = op
+        if not isinstance(start, int) or not isinstance(end, int) or not isinstance(replacement, str):
+            raise ValueError('Patch op start/end must be integers and replacement a string')
+        if start < position or end < start or end > len(text):
+            raise ValueError('Patch ops must be in order, non-overlapping and within the text')
+        result.append(text[position:start])
+        result.append(replacement)
+        position = end
+    result.append(text[position:])
+    return ''.join(result)
+
+
+def apply_field_patches(content: Dict[str, Any], patches: Dict[str, List[list]]) -> Dict[str, Any]:
+    """Copy of content with per-field text patches applied"""
+    if not isinstance(patches, dict):
+        raise ValueError('patches must map field names to lists of ops')
+
+    content = dict(content)
+    for field, ops in patches.items():
+        current = content.get(field, '')
+        if not isinstance(current, str) or not isinstance(ops, list):
+            raise ValueError(f"Field {field!r} cannot be patched")
+        content[field] = apply_text_patch(current, ops)
+    return content
+
+
+class VersionedDocument:
+    """A JSON document on disk with optimistic-concurrency reads and writes shared across workers"""
+
+    def __init__(self, path: str, defaults: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.defaults = dict(defaults or {})
+        self._lock = threading.Lock()
+        self._content = None
+        self._version = None
+        self._mtime = None
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the thread lock and, where available, an flock shared by every worker process"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.path}.lock", 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        """Refresh the in-memory copy if the file changed since it was last read"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if self._content is not None and mtime == self._mtime:
+            return
+
+        content = dict(self.defaults)
+        if mtime is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    content = json.load(f)
+            except Exception as e:
+                print(f"Content load error: {e}")
+
+        self._content = content
+        self._version = content_version(content)
+        self._mtime = mtime
+
+    def _write(self, content: Dict[str, Any]):
+        """Replace the file atomically and update the in-memory copy"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._content = content
+        self._version = content_version(content)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def get(self) -> Tuple[Dict[str, Any], str]:
+        """Return (content, version)"""
+        with self._lock:
+            self._load()
+            return dict(self._content), self._version
+
+    def patch(self, base_version: str, patches: Dict[str, List[list]]) -> Tuple[Dict[str, Any], str]:
+        """Apply per-field text patches made against base_version"""
+        with self._exclusive():
+            self._load()
+            if base_version != self._version:
+                raise VersionConflict(self._version, dict(self._content))
+
+            content = apply_field_patches(self._content, patches)
+            self._write(content)
+            return dict(content), self._version
+
+    def put(self, content: Dict[str, Any], base_version: Optional[str] = None) -> Tuple[Dict[str, Any], str]:
+        """Replace the whole document, checking base_version when one is given"""
+        with self._exclusive():
+            self._load()
+            if base_version is not None and base_version != self._version:
+                raise VersionConflict(self._version, dict(self._content))
+            self._write(dict(content))
+            return dict(content), self._version
+
+
+class SQLiteConnectionPool:
+    """Fixed-size pool of WAL-mode SQLite connections shared by a worker's threads"""
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: statements autocommit unless a transaction is opened explicitly
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            conn = self._connect() if create else self._idle.get(timeout=30)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+
+class ContentDatabase:
+    """Connection pool, schema and snapshots for the content database (SQLite or Postgres)"""
+
+    def __init__(self, url: str = CONTENT_DATABASE_URL, pool_size: int = CONTENT_POOL_SIZE):
+        self.url = url
+        self.pool_size = pool_size
+        self.is_postgres = url.startswith(('postgres://', 'postgresql://'))
+        if self.is_postgres and psycopg2 is None:
+            raise RuntimeError('CONTENT_DATABASE_URL points at Postgres but psycopg2 is not installed')
+        if not self.is_postgres and not url.startswith('sqlite:///'):
+            raise ValueError(f"Unsupported content database URL: {url}")
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        """Create the pool lazily, and again in each forked gunicorn worker"""
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                if self.is_postgres:
+                    self._pool = psycopg2.pool.ThreadedConnectionPool(1, self.pool_size, self.url)
+                else:
+                    self._pool = SQLiteConnectionPool(self.url[len('sqlite:///'):], self.pool_size)
+                self._pool_pid = os.getpid()
+                with self._connection() as conn:
+                    self.execute(conn, CONTENT_SCHEMA)
+                    if self.is_postgres:
+                        conn.commit()
+            return self._pool
+
+    @contextmanager
+    def _connection(self):
+        if not self.is_postgres:
+            with self._pool.connection() as conn:
+                yield conn
+            return
+        conn = self._pool.getconn()
+        try:
+            yield conn
+        finally:
+            if not conn.closed:
+                conn.rollback()
+            self._pool.putconn(conn)
+
+    def execute(self, conn, sql: str, params: tuple = ()):
+        """Run a statement written with ? placeholders on either backend; returns the cursor"""
+        if self.is_postgres:
+            cursor = conn.cursor()
+            cursor.execute(sql.replace('?', '%s'), params)
+            return cursor
+        return conn.execute(sql, params)
+
+    @contextmanager
+    def read(self):
+        """A pooled connection for reads; in WAL mode readers never wait for writers"""
+        self._get_pool()
+        with self._connection() as conn:
+            yield conn
+
+    @contextmanager
+    def transaction(self):
+        """A pooled connection inside a write transaction, committed on success"""
+        self._get_pool()
+        with self._connection() as conn:
+            if not self.is_postgres:
+                # Take the write lock up front so read-check-write can't interleave with another writer
+                conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def snapshot(self, dest_path: str) -> str:
+        """Copy the database to dest_path without blocking readers; returns the path written.
+
+        SQLite uses the online backup API. Postgres snapshots are a JSON export of the
+        documents table; use pg_dump for full database backups.
+        """
+        self._get_pool()
+        tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+
+        if self.is_postgres:
+            with self.read() as conn:
+                rows = self.execute(conn, 'SELECT name, body, version, updated_at FROM content_documents').fetchall()
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump([{'name': r[0], 'body': json.loads(r[1]), 'version': r[2], 'updated_at': r[3]}
+                           for r in rows], f, indent=2, ensure_ascii=False)
+        else:
+            target = sqlite3.connect(tmp_path)
+            try:
+                with self.read() as conn:
+                    conn.backup(target, pages=SNAPSHOT_PAGES, sleep=0.005)
+            finally:
+                target.close()
+
+        os.replace(tmp_path, dest_path)
+        return dest_path
+
+
+class SQLDocument:
+    """A JSON document stored as one row of the content database.
+
+    Same interface and version semantics as VersionedDocument: reads are a primary-key
+    lookup on a pooled connection, and writes check the version and update inside one
+    transaction, so concurrent workers can't lose each other's saves.
+
+    With json_path set, the row is seeded from that file and every write re-exports it
+    there inside the transaction, so the project zip, GitHub push, full_project snapshots
+    and the backup watcher keep seeing the current content. The database is authoritative:
+    a hand edit to the file is noticed by its changed mtime/size and imported as a new
+    version before the next read or write, so editors holding the old version get a 409
+    rather than silently overwriting it.
+    """
+
+    def __init__(self, database: ContentDatabase, name: str,
+                 defaults: Optional[Dict[str, Any]] = None, json_path: Optional[str] = None):
+        self.database = database
+        self.name = name
+        self.defaults = dict(defaults or {})
+        self.json_path = json_path
+        # (mtime_ns, size) of json_path when this process last knew it matched the row
+        self._file_signature = None
+
+    def _initial_content(self) -> Dict[str, Any]:
+        """Content for a new row: the JSON file if there is one, else the defaults"""
+        if self.json_path and os.path.exists(self.json_path):
+            try:
+                with open(self.json_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Content import error: {e}")
+        return dict(self.defaults)
+
+    def _ensure_row(self, conn):
+        content = self._initial_content()
+        self.database.execute(
+            conn,
+            'INSERT INTO content_documents (name, body, version, updated_at) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (name) DO NOTHING',
+            (self.name, json.dumps(content, ensure_ascii=False), content_version(content),
+             datetime.utcnow().isoformat()))
+
+    def _file_stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.json_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _sync_from_file(self):
+        """Import json_path into the row if it changed other than through our own exports"""
+        if not self.json_path:
+            return
+        signature = self._file_stat()
+        if signature is None or signature == self._file_signature:
+            return
+        try:
+            with open(self.json_path, 'r', encoding='utf-8') as f:
+                content = json.load(f)
+        except Exception as e:
+            print(f"Content import error: {e}")
+            return
+
+        lock_clause = ' FOR UPDATE' if self.database.is_postgres else ''
+        # Compared under the write lock: another worker's export may be ahead of its commit
+        with self.database.transaction() as conn:
+            row = self.database.execute(
+                conn, 'SELECT body FROM content_documents WHERE name = ?' + lock_clause, (self.name,)).fetchone()
+            if row is None:
+                self._ensure_row(conn)
+            elif json.loads(row[0]) != content:
+                print(f"Content import: {self.json_path} was edited outside the app; storing it as a new version")
+                self.database.execute(
+                    conn, 'UPDATE content_documents SET body = ?, version = ?, updated_at = ? WHERE name = ?',
+                    (json.dumps(content, ensure_ascii=False), content_version(content),
+                     datetime.utcnow().isoformat(), self.name))
+        self._file_signature = signature
+
+    def get(self) -> Tuple[Dict[str, Any], str]:
+        """Return (content, version)"""
+        self._sync_from_file()
+        with self.database.read() as conn:
+            row = self.database.execute(
+                conn, 'SELECT body, version FROM content_documents WHERE name = ?', (self.name,)).fetchone()
+        if row is None:
+            with self.database.transaction() as conn:
+                self._ensure_row(conn)
+            return self.get()
+        return json.loads(row[0]), row[1]
+
+    def _update(self, base_version: Optional[str], make_content) -> Tuple[Dict[str, Any], str]:
+        """Read, check and rewrite the row in a single transaction"""
+        self._sync_from_file()
+        lock_clause = ' FOR UPDATE' if self.database.is_postgres else ''
+        select = 'SELECT body, version FROM content_documents WHERE name = ?' + lock_clause
+        with self.database.transaction() as conn:
+            row = self.database.execute(conn, select, (self.name,)).fetchone()
+            if row is None:
+                self._ensure_row(conn)
+                row = self.database.execute(conn, select, (self.name,)).fetchone()
+            body, version = row
+            current = json.loads(body)
+            if base_version is not None and base_version != version:
+                raise VersionConflict(version, current)
+
+            content = make_content(current)
+            new_version = content_version(content)
+            self.database.execute(
+                conn, 'UPDATE content_documents SET body = ?, version = ?, updated_at = ? WHERE name = ?',
+                (json.dumps(content, ensure_ascii=False), new_version, datetime.utcnow().isoformat(), self.name))
+            # Still holding the write lock, so exports land in commit order; a failed export rolls back
+            self._export(content)
+        if self.json_path:
+            self._file_signature = self._file_stat()
+        return dict(content), new_version
+
+    def _export(self, content: Dict[str, Any]):
+        """Mirror the document to json_path atomically"""
+        if not self.json_path:
+            return
+        tmp_path = f"{self.json_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.json_path)
+
+    def patch(self, base_version: str, patches: Dict[str, List[list]]) -> Tuple[Dict[str, Any], str]:
+        """Apply per-field text patches made against base_version"""
+        return self._update(base_version, lambda current: apply_field_patches(current, patches))
+
+    def put(self, content: Dict[str, Any], base_version: Optional[str] = None) -> Tuple[Dict[str, Any], str]:
+        """Replace the whole document, checking base_version when one is given"""
+        return self._update(base_version, lambda current: dict(content))
+
+# Shared content database; None when CONTENT_DATABASE_URL=json keeps the file-based store
+content_database = ContentDatabase() if CONTENT_DATABASE_URL != 'json' else None
+
+# Philosophy section text shown on the homepage, mirrored to the JSON file the backups include
+if content_database is not None:
+    philosophy_document = SQLDocument(content_database, 'philosophy', PHILOSOPHY_DEFAULTS,
+                                      json_path='static/philosophy_content.json')
+else:
+    philosophy_document = VersionedDocument('static/philosophy_content.json', PHILOSOPHY_DEFAULTS)
@@ -0,0 +1,197 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, Any, List, Optional
+
+CSS_DIR = 'static/css'
+
+# Stylesheets merged into the bundle, in cascade order
+SOURCE_FILES = ['style.css', 'text_editor_generated.css']
+
+MANIFEST_FILE = 'bundle-manifest.json'
+
+# Selectors styling the header, carousel and philosophy section the homepage shows before scrolling
+CRITICAL_SELECTOR_PATTERN = re.compile(
+    r'(^|[\s,>+~])(html|body|\.header|\.brand-name|\.menu-link|\.dropdown|\.page-section|'
+    r'\.section-overlay|\.carousel|\.availability-button|\.philosophy|\.content-container|\.container)'
+)
+
+RELATIVE_URL_PATTERN = re.compile(r'url\(\s*([\'"]?)(?![\'"]?(?:data:|https?:|/))([^\'")]+)\1\s*\)')
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and redundant whitespace while leaving string literals untouched"""
+    out = []
+    i = 0
+    length = len(css)
+    pending_space = False
+
+    while i < length:
+        c = css[i]
+
+        if c == '/' and css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+            continue
+
+        if c.isspace():
+            pending_space = True
+            i += 1
+            continue
+
+        if c in '"\'':
+            end = i + 1
+            while end < length and css[end] != c:
+                end += 2 if css[end] == '\\' else 1
+            if pending_space and out and out[-1] not in '{};,>:(':
+                out.append(' ')
+            pending_space = False
+            out.append(css[i:end + 1])
+            i = end + 1
+            continue
+
+        if c in '{};,>)':
+            pending_space = False
+            # Drop the semicolon before a closing brace
+            if c == '}' and out and out[-1] == ';':
+                out.pop()
+            out.append(c)
+            i += 1
+            continue
+
+        if pending_space and out and out[-1] not in '{};,>:(':
+            out.append(' ')
+        pending_space = False
+        out.append(c)
+        i += 1
+
+    return ''.join(out).strip()
+
+
+def split_rules(css: str) -> List[str]:
+    """Split minified CSS into top-level rules and at-rule blocks"""
+    rules = []
+    depth = 0
+    start = 0
+    i = 0
+    while i < len(css):
+        c = css[i]
+        if c in '"\'':
+            end = i + 1
+            while end < len(css) and css[end] != c:
+                end += 2 if css[end] == '\\' else 1
+            i = end + 1
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append(css[start:i + 1])
+                start = i + 1
+        elif c == ';' and depth == 0:
+            # Block-less at-rules such as @charset or @import
+            rules.append(css[start:i + 1])
+            start = i + 1
+        i += 1
+    return rules
+
+
+def extract_critical(css: str) -> str:
+    """Keep only the rules (including ones nested in @media) that style above-the-fold elements"""
+    critical = []
+    for rule in split_rules(css):
+        if rule.startswith('@media') or rule.startswith('@supports'):
+            prelude, body = rule.split('{', 1)
+            inner = [r for r in split_rules(body[:-1]) if CRITICAL_SELECTOR_PATTERN.search(r.split('{', 1)[0])]
+            if inner:
+                critical.append(f"{prelude}{{{''.join(inner)}}}")
+        elif rule.startswith('@'):
+            continue
+        elif CRITICAL_SELECTOR_PATTERN.search(rule.split('{', 1)[0]):
+            critical.append(rule)
+    return ''.join(critical)
+
+
+class CSSPipeline:
+    """Merges the site stylesheets into one versioned, minified bundle plus inlineable critical CSS"""
+
+    def __init__(self, css_dir: str = CSS_DIR):
+        self.css_dir = css_dir
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._manifest_mtime = None
+
+    def build(self) -> Optional[Dict[str, Any]]:
+        """Rebuild the bundle from the source stylesheets and publish a new manifest"""
+        try:
+            sources = []
+            for name in SOURCE_FILES:
+                path = os.path.join(self.css_dir, name)
+                if os.path.exists(path):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        sources.append(f.read())
+
+            bundle = minify_css('\n'.join(sources))
+            digest = hashlib.sha256(bundle.encode('utf-8')).hexdigest()[:12]
+            bundle_name = f"bundle.{digest}.css"
+
+            # Inline CSS resolves url() against the page, so make relative references absolute
+            critical = extract_critical(bundle)
+            critical = RELATIVE_URL_PATTERN.sub(
+                lambda m: f"url({m.group(1)}/{self.css_dir}/{m.group(2)}{m.group(1)})", critical)
+            critical = critical.replace('</', '<\\/')
+
+            with self._lock:
+                bundle_path = os.path.join(self.css_dir, bundle_name)
+                if not os.path.exists(bundle_path):
+                    self._write_atomic(bundle_path, bundle)
+
+                manifest = {'bundle': bundle_name, 'critical': critical}
+                self._write_atomic(os.path.join(self.css_dir, MANIFEST_FILE), json.dumps(manifest))
+                self._manifest = manifest
+                self._manifest_mtime = os.path.getmtime(os.path.join(self.css_dir, MANIFEST_FILE))
+
+                # Remove superseded bundles
+                for old_path in glob.glob(os.path.join(self.css_dir, 'bundle.*.css')):
+                    if os.path.basename(old_path) != bundle_name:
+                        os.remove(old_path)
+
+            print(f"CSS bundle built: {bundle_name} ({len(bundle)} bytes, {len(critical)} critical)")
+            return manifest
+
+        except Exception as e:
+            print(f"CSS bundle error: {e}")
+            return None
+
+    @staticmethod
+    def _write_atomic(path: str, content: str):
+        """Write a file so readers never see it half written"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def get_manifest(self) -> Optional[Dict[str, Any]]:
+        """Current bundle manifest, re-read when another worker has rebuilt it"""
+        path = os.path.join(self.css_dir, MANIFEST_FILE)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        self._manifest = json.load(f)
+                    self._manifest_mtime = mtime
+                except Exception as e:
+                    print(f"CSS manifest load error: {e}")
+            return self._manifest
+
+# Global CSS pipeline instance
+css_pipeline = CSSPipeline()
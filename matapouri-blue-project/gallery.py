@@ -0,0 +1,192 @@
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+import urllib.parse
+from io import BytesIO
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it the manifest only carries dimensions
+    Image = None
+
+GALLERY_DIR = 'attached_assets'
+CACHE_FILE = 'gallery_cache.json'
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Width of the low-quality placeholder embedded in the manifest
+LQIP_WIDTH = 16
+
+# Carousel order; images not listed here follow alphabetically
+GALLERY_ORDER = [
+    'Garden_1752715224980.jpeg',
+    'Lounge studio_1752715224981.jpeg',
+    'Blue heron_1752719468329.jpeg',
+]
+
+
+def _exif_orientation(segment: bytes) -> int:
+    """EXIF orientation tag from an APP1 segment payload, 1 if absent"""
+    if not segment.startswith(b'Exif\0\0'):
+        return 1
+    tiff = segment[6:]
+    endian = '<' if tiff[:2] == b'II' else '>'
+    try:
+        ifd_offset = struct.unpack(endian + 'I', tiff[4:8])[0]
+        count = struct.unpack(endian + 'H', tiff[ifd_offset:ifd_offset + 2])[0]
+        for i in range(count):
+            entry = tiff[ifd_offset + 2 + i * 12:ifd_offset + 14 + i * 12]
+            tag, _, _, value = struct.unpack(endian + 'HHI4s', entry)
+            if tag == 0x0112:
+                return struct.unpack(endian + 'H', value[:2])[0]
+    except struct.error:
+        pass
+    return 1
+
+
+def read_dimensions(path: str) -> Optional[Tuple[int, int]]:
+    """Displayed (width, height) read from the file header, honouring EXIF rotation"""
+    with open(path, 'rb') as f:
+        head = f.read(24)
+        if head.startswith(b'\x89PNG\r\n\x1a\n'):
+            return struct.unpack('>II', head[16:24])
+
+        if not head.startswith(b'\xff\xd8'):
+            return None
+
+        f.seek(2)
+        orientation = 1
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            length = struct.unpack('>H', f.read(2))[0]
+            if marker[1] == 0xE1 and orientation == 1:
+                orientation = _exif_orientation(f.read(length - 2))
+                continue
+            # Start-of-frame markers carry the image size
+            if marker[1] in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                height, width = struct.unpack('>xHH', f.read(5))
+                return (height, width) if orientation >= 5 else (width, height)
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def analyse_image(path: str) -> Dict[str, Any]:
+    """Dimensions, dominant colour and a tiny base64 placeholder for one image"""
+    info = {}
+    dimensions = read_dimensions(path)
+    if dimensions:
+        info['width'], info['height'] = dimensions
+
+    if Image is None:
+        return info
+
+    with Image.open(path) as img:
+        # Decode at reduced scale; a placeholder doesn't need the full-resolution image
+        img.draft('RGB', (LQIP_WIDTH * 8, LQIP_WIDTH * 8))
+        img = ImageOps.exif_transpose(img).convert('RGB')
+
+        r, g, b = img.resize((1, 1), Image.LANCZOS).getpixel((0, 0))
+        info['color'] = f"#{r:02x}{g:02x}{b:02x}"
+
+        lqip_height = max(1, round(LQIP_WIDTH * img.height / img.width))
+        thumb = img.resize((LQIP_WIDTH, lqip_height), Image.LANCZOS)
+        buffer = BytesIO()
+        thumb.save(buffer, 'JPEG', quality=40)
+        info['lqip'] = 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+    return info
+
+
+class GalleryManifest:
+    """Builds the carousel manifest from attached_assets, analysing each image once per content hash"""
+
+    def __init__(self, gallery_dir: str = GALLERY_DIR, cache_file: str = CACHE_FILE):
+        self.gallery_dir = gallery_dir
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._by_hash = None
+        self._hashes = {}
+
+    def _load_cache(self):
+        """Load analysed images keyed by file hash"""
+        if self._by_hash is not None:
+            return
+        self._by_hash = {}
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    self._by_hash = json.load(f)
+            except Exception as e:
+                print(f"Gallery cache load error: {e}")
+
+    def _save_cache(self):
+        """Persist analysed images so restarts don't re-decode every photo"""
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._by_hash, f)
+        os.replace(tmp_file, self.cache_file)
+
+    def _hash_for(self, path: str, st: os.stat_result) -> str:
+        """Content hash, recomputed only when size or mtime change"""
+        key = (st.st_size, st.st_mtime_ns)
+        cached = self._hashes.get(path)
+        if cached is None or cached[0] != key:
+            cached = (key, file_hash(path))
+            self._hashes[path] = cached
+        return cached[1]
+
+    def get_images(self) -> List[Dict[str, Any]]:
+        """Manifest entries for every image, in carousel order"""
+        if not os.path.isdir(self.gallery_dir):
+            return []
+
+        names = [n for n in os.listdir(self.gallery_dir) if n.lower().endswith(IMAGE_EXTENSIONS)]
+        names.sort(key=lambda n: (GALLERY_ORDER.index(n) if n in GALLERY_ORDER else len(GALLERY_ORDER), n))
+
+        images = []
+        with self._lock:
+            self._load_cache()
+            changed = False
+            for name in names:
+                path = os.path.join(self.gallery_dir, name)
+                try:
+                    digest = self._hash_for(path, os.stat(path))
+                    if digest not in self._by_hash or ('lqip' not in self._by_hash[digest] and Image is not None):
+                        self._by_hash[digest] = analyse_image(path)
+                        changed = True
+                except Exception as e:
+                    print(f"Gallery image error for {name}: {e}")
+                    continue
+
+                entry = dict(self._by_hash[digest])
+                entry.update({
+                    'src': f"/{self.gallery_dir}/{urllib.parse.quote(name)}",
+                    'alt': os.path.splitext(name)[0].rsplit('_', 1)[0],
+                    'hash': digest[:16],
+                })
+                images.append(entry)
+
+            if changed:
+                try:
+                    self._save_cache()
+                except Exception as e:
+                    print(f"Gallery cache save error: {e}")
+
+        return images
+
+# Global gallery manifest instance
+gallery_manifest = GalleryManifest()
@@ -0,0 +1,378 @@
+# HTTP load test: starts the app under gunicorn in a scratch copy of the project (so philosophy
+# saves and backups don't touch the real files), replays a weighted mix of public and admin
+# traffic, and reports per-route throughput, latency percentiles and error rates.
+#
+#     python loadtest.py --duration 30 --concurrency 16
+#     python loadtest.py --write-baseline          # record loadtest_baseline.json
+#     python loadtest.py --baseline loadtest_baseline.json   # exit 1 on regression
+#
+# Use --url to point at an already running server instead of starting gunicorn. Scenarios that
+# change site content are left out there unless --allow-writes is given.
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+ABOUT_PAGES = [
+    '/about',
+    '/about/unique-holiday-experience',
+    '/about/accommodation-and-facilities',
+    '/about/discover-kinloch',
+    '/about/your-hosts',
+    '/about/room-rates',
+    '/about/booking-times',
+    '/about/cancellation-policy',
+    '/about/transport',
+    '/about/respite-studio-guidelines',
+]
+
+# Relative weight of each scenario in the replayed traffic
+DEFAULT_MIX = {
+    'home': 40,
+    'about': 30,
+    'assets': 25,
+    'save-philosophy': 4,
+    'download-project': 1,
+}
+
+# Scenarios that overwrite site content; only run against the scratch copy unless allowed
+WRITE_SCENARIOS = {'save-philosophy'}
+
+# Sent with every request, as browsers do, so responses go through compression
+DEFAULT_HEADERS = {'Accept-Encoding': 'gzip, br'}
+
+# For requests whose JSON reply is read back: brotli is optional here, so only ask for gzip
+JSON_HEADERS = {'Accept-Encoding': 'gzip'}
+
+# Number of back-to-back saves in one save-philosophy burst
+SAVE_BURST = 5
+
+# Directories left out of the scratch copy the server runs in
+COPY_IGNORE = shutil.ignore_patterns('.git', '__pycache__', 'backups', 'tile_cache', '*.lock', 'bundle.*.css',
+                                     'content.db*')
+
+# Statuses that mean the server shed load on purpose rather than failed
+THROTTLED_STATUSES = (429,)
+
+# Statuses for saves rejected because another client saved first; expected when savers overlap
+CONFLICT_STATUSES = (409,)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    """'home=50,about=20' -> weights, starting from DEFAULT_MIX"""
+    mix = dict(DEFAULT_MIX)
+    if spec:
+        for item in spec.split(','):
+            name, _, weight = item.partition('=')
+            if name not in DEFAULT_MIX:
+                raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+            mix[name] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+class Recorder:
+    """Thread-safe latency and status samples per route"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.recording = False
+
+    def add(self, route: str, latency: float, status: int):
+        if not self.recording:
+            return
+        with self._lock:
+            self.samples[route].append((latency, status))
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        """Per-route requests, rps, p50/p95/p99 (ms), error rate, throttled and conflict counts"""
+        report = {}
+        with self._lock:
+            items = list(self.samples.items())
+        for route, samples in sorted(items):
+            latencies = sorted(latency * 1000 for latency, _ in samples)
+            expected = THROTTLED_STATUSES + CONFLICT_STATUSES
+            errors = sum(1 for _, status in samples if status == 0 or (status >= 400 and status not in expected))
+            throttled = sum(1 for _, status in samples if status in THROTTLED_STATUSES)
+            conflicts = sum(1 for _, status in samples if status in CONFLICT_STATUSES)
+            report[route] = {
+                'requests': len(samples),
+                'rps': round(len(samples) / elapsed, 2),
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'p99': round(percentile(latencies, 99), 2),
+                'error_rate': round(errors / len(samples), 4),
+                'throttled': throttled,
+                'conflicts': conflicts,
+            }
+        return report
+
+
+class LoadClient:
+    """One simulated visitor with a keep-alive connection"""
+
+    def __init__(self, host: str, port: int, recorder: Recorder, assets: List[str]):
+        self.host = host
+        self.port = port
+        self.recorder = recorder
+        self.assets = assets
+        self.conn = None
+
+    def request(self, route: str, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """Send one request, reading the whole body, and record its latency under route; returns JSON bodies"""
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        started = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=body, headers=dict(DEFAULT_HEADERS, **(headers or {})))
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+            content_type = response.getheader('Content-Type', '')
+            encoding = response.getheader('Content-Encoding')
+            if response.getheader('Connection', '').lower() == 'close':
+                self.conn.close()
+                self.conn = None
+        except (OSError, http.client.HTTPException):
+            status = 0
+            self.conn.close()
+            self.conn = None
+        self.recorder.add(route, time.perf_counter() - started, status)
+
+        if status == 0 or not content_type.startswith('application/json'):
+            return None
+        if encoding == 'gzip':
+            data = gzip.decompress(data)
+        elif encoding:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def current_version(self) -> str:
+        """Version of the philosophy text, for If-Match on saves"""
+        result = self.request('/api/content/philosophy', 'GET', '/api/content/philosophy', headers=JSON_HEADERS)
+        return (result or {}).get('version', '')
+
+    def run_scenario(self, name: str):
+        if name == 'home':
+            self.request('/', 'GET', '/')
+        elif name == 'about':
+            self.request('/about/*', 'GET', random.choice(ABOUT_PAGES))
+        elif name == 'assets' and self.assets:
+            self.request('/attached_assets/*', 'GET', random.choice(self.assets))
+        elif name == 'save-philosophy':
+            # Saves need the current version in If-Match; each save (or conflict) returns the next one
+            version = self.current_version()
+            for i in range(SAVE_BURST):
+                body = json.dumps({
+                    'title': 'Our name, our philosophy',
+                    'text1': f"Load test save {random.random()}",
+                    'text2': 'Strong roots, a sense of direction.',
+                }).encode('utf-8')
+                result = self.request('/save-philosophy', 'POST', '/save-philosophy', body,
+                                      dict(JSON_HEADERS, **{'Content-Type': 'application/json',
+                                                            'If-Match': f'"{version}"'}))
+                version = (result or {}).get('version', version)
+        elif name == 'download-project':
+            self.request('/download-project', 'GET', '/download-project')
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(project_dir: str, workers: int, threads: int) -> Tuple[subprocess.Popen, str, int]:
+    """Copy the project to a scratch directory and run gunicorn there; returns (process, dir, port)"""
+    scratch = tempfile.mkdtemp(prefix='matapouri-loadtest-')
+    app_dir = os.path.join(scratch, 'app')
+    shutil.copytree(project_dir, app_dir, ignore=COPY_IGNORE)
+
+    port = free_port()
+    env = dict(os.environ)
+    env['ADMISSION_STATE_DIR'] = os.path.join(scratch, 'admission')
+    env['PROFILE_DIR'] = os.path.join(scratch, 'profiles')
+    env['TILE_CACHE_DIR'] = os.path.join(scratch, 'tile_cache')
+
+    log = open(os.path.join(scratch, 'gunicorn.log'), 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+         '--bind', f"127.0.0.1:{port}", '--log-level', 'warning', 'main:app'],
+        cwd=app_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited early, see {log.name}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/about')
+            conn.getresponse().read()
+            conn.close()
+            return process, scratch, port
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn did not start within 30s, see {log.name}")
+
+
+def run_load(host: str, port: int, mix: Dict[str, float], duration: float, warmup: float,
+             concurrency: int, assets: List[str]) -> Tuple[Dict[str, Dict[str, Any]], float]:
+    """Replay the mix from `concurrency` threads; returns (per-route summary, measured seconds)"""
+    recorder = Recorder()
+    stop = threading.Event()
+    names = list(mix)
+    weights = [mix[n] for n in names]
+
+    def worker():
+        client = LoadClient(host, port, recorder, assets)
+        try:
+            while not stop.is_set():
+                client.run_scenario(random.choices(names, weights)[0])
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+
+    time.sleep(warmup)
+    recorder.recording = True
+    started = time.perf_counter()
+    time.sleep(duration)
+    recorder.recording = False
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    for t in threads:
+        t.join(timeout=60)
+    return recorder.summary(elapsed), elapsed
+
+
+def compare(report: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """Regressions against the baseline: slower p95/p99, lower throughput or more errors"""
+    problems = []
+    for route, base in baseline.items():
+        current = report.get(route)
+        if current is None:
+            problems.append(f"{route}: no requests recorded")
+            continue
+        for key in ('p95', 'p99'):
+            if base[key] > 0 and current[key] > base[key] * (1 + tolerance):
+                problems.append(f"{route}: {key} {current[key]}ms vs baseline {base[key]}ms")
+        if current['rps'] < base['rps'] * (1 - tolerance):
+            problems.append(f"{route}: {current['rps']} req/s vs baseline {base['rps']} req/s")
+        if current['error_rate'] > base['error_rate'] + 0.01:
+            problems.append(f"{route}: error rate {current['error_rate']:.2%} vs baseline {base['error_rate']:.2%}")
+    return problems
+
+
+def print_report(report: Dict[str, Dict[str, Any]], elapsed: float):
+    print(f"\n{'route':<22}{'reqs':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'429s':>6}{'409s':>6}")
+    for route, row in report.items():
+        print(f"{route:<22}{row['requests']:>7}{row['rps']:>9}{row['p50']:>9}{row['p95']:>9}"
+              f"{row['p99']:>9}{row['error_rate']:>8.1%}{row['throttled']:>6}{row['conflicts']:>6}")
+    total = sum(row['requests'] for row in report.values())
+    print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Load test the site under gunicorn')
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds before recording')
+    parser.add_argument('--concurrency', type=int, default=16, help='simulated visitors')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--mix', help='scenario weights, e.g. home=50,about=20,download-project=0')
+    parser.add_argument('--url', help='test a running server instead of starting gunicorn')
+    parser.add_argument('--allow-writes', action='store_true',
+                        help=f"with --url, also run scenarios that change content ({', '.join(sorted(WRITE_SCENARIOS))})")
+    parser.add_argument('--baseline', help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed fractional slowdown')
+    parser.add_argument('--write-baseline', nargs='?', const='loadtest_baseline.json',
+                        help='save this run as the baseline')
+    args = parser.parse_args()
+
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    asset_dir = os.path.join(project_dir, 'attached_assets')
+    assets = [f"/attached_assets/{urllib.parse.quote(name)}" for name in sorted(os.listdir(asset_dir))
+              if not name.startswith('.')] if os.path.isdir(asset_dir) else []
+
+    mix = parse_mix(args.mix)
+    if args.url and not args.allow_writes:
+        skipped = sorted(WRITE_SCENARIOS & set(mix))
+        if skipped:
+            print(f"Skipping {', '.join(skipped)} against {args.url}; pass --allow-writes to include")
+        mix = {name: weight for name, weight in mix.items() if name not in WRITE_SCENARIOS}
+        if not mix:
+            parser.error('no read-only scenarios left in the mix')
+
+    process = scratch = None
+    if args.url:
+        target = urllib.parse.urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        process, scratch, port = start_server(project_dir, args.workers, args.threads)
+        host = '127.0.0.1'
+        print(f"gunicorn running on port {port} with {args.workers} worker(s) in {scratch}")
+
+    try:
+        report, elapsed = run_load(host, port, mix, args.duration, args.warmup,
+                                   args.concurrency, assets)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    print_report(report, elapsed)
+
+    if args.write_baseline:
+        with open(args.write_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.write_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        problems = compare(report, baseline, args.tolerance)
+        if problems:
+            print('\nRegressions against baseline:')
+            for problem in problems:
+                print(f"  {problem}")
+            return 1
+        print('\nNo regressions against baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+# Source data for the Kinloch map, stored as [lat, lon] pairs like the Leaflet code used
+FEATURES_FILE = 'static/map_features.json'
+
+MIN_ZOOM = 0
+MAX_ZOOM = 18
+
+# Maps each section of the source file to the layer name exposed in GeoJSON
+LAYERS = {
+    'trails': 'trail',
+    'gpsImages': 'gps_image',
+    'pointsOfInterest': 'poi',
+    'trackDetails': 'track_detail',
+    'waterTaxiRoutes': 'water_taxi_route',
+    'waterTaxiPickup': 'water_taxi_pickup',
+}
+
+
+def douglas_peucker(points: List[List[float]], tolerance: float) -> List[List[float]]:
+    """Simplify a [lat, lon] polyline, keeping points further than tolerance (degrees) from the chord"""
+    if len(points) < 3 or tolerance <= 0:
+        return list(points)
+
+    # Scale longitude so distances are roughly isotropic at this latitude
+    scale = math.cos(math.radians(points[0][0]))
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        ay, ax = points[start][0], points[start][1] * scale
+        by, bx = points[end][0], points[end][1] * scale
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+
+        max_dist = 0.0
+        index = start
+        for i in range(start + 1, end):
+            py, px = points[i][0], points[i][1] * scale
+            if length_sq == 0:
+                dist = math.hypot(px - ax, py - ay)
+            else:
+                t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+                dist = math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+            if dist > max_dist:
+                max_dist = dist
+                index = i
+
+        if max_dist > tolerance:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def zoom_tolerance(zoom: int) -> float:
+    """Half a screen pixel in degrees at the given web-mercator zoom level"""
+    return 360.0 / (256 * 2 ** zoom) / 2
+
+
+def snap_bbox(bbox: Tuple[float, float, float, float], zoom: int) -> Tuple[float, float, float, float]:
+    """Expand a (west, south, east, north) box outward to the tile grid so nearby viewports share a cache entry"""
+    step = 360.0 / 2 ** zoom
+    west, south, east, north = bbox
+    return (
+        math.floor(west / step) * step,
+        math.floor(south / step) * step,
+        math.ceil(east / step) * step,
+        math.ceil(north / step) * step,
+    )
+
+
+class MapFeatureIndex:
+    """Serves the Kinloch map features as GeoJSON, simplified per zoom level and cached with ETags"""
+
+    def __init__(self, features_file: str = FEATURES_FILE, max_cached_responses: int = 256):
+        self.features_file = features_file
+        self.max_cached_responses = max_cached_responses
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._source = {}
+        self._zoom_cache = {}
+        self._response_cache = OrderedDict()
+
+    def _reload_if_changed(self):
+        """Reload the source file when it changes on disk, dropping every cached result"""
+        try:
+            mtime = os.path.getmtime(self.features_file)
+        except OSError:
+            mtime = None
+
+        if mtime == self._mtime:
+            return
+
+        source = {}
+        if mtime is not None:
+            try:
+                with open(self.features_file, 'r', encoding='utf-8') as f:
+                    source = json.load(f)
+            except Exception as e:
+                print(f"Map features load error: {e}")
+
+        self._source = source
+        self._mtime = mtime
+        self._zoom_cache.clear()
+        self._response_cache.clear()
+
+    def _build_features(self, zoom: int) -> List[Dict[str, Any]]:
+        """Convert the source data into GeoJSON features, simplifying polylines for this zoom"""
+        tolerance = zoom_tolerance(zoom)
+        features = []
+
+        for section, layer in LAYERS.items():
+            items = self._source.get(section)
+            if items is None:
+                continue
+            if isinstance(items, dict):
+                items = [items]
+
+            for item in items:
+                coordinates = item.get('coordinates')
+                if not coordinates:
+                    continue
+
+                properties = {key: value for key, value in item.items() if key != 'coordinates'}
+                properties['layer'] = layer
+
+                if isinstance(coordinates[0], list):
+                    line = douglas_peucker(coordinates, tolerance)
+                    lats = [point[0] for point in line]
+                    lons = [point[1] for point in line]
+                    geometry = {
+                        'type': 'LineString',
+                        'coordinates': [[lon, lat] for lat, lon in line],
+                    }
+                    bounds = (min(lons), min(lats), max(lons), max(lats))
+                else:
+                    lat, lon = coordinates
+                    geometry = {'type': 'Point', 'coordinates': [lon, lat]}
+                    bounds = (lon, lat, lon, lat)
+
+                features.append({
+                    'feature': {'type': 'Feature', 'geometry': geometry, 'properties': properties},
+                    'bounds': bounds,
+                })
+
+        return features
+
+    def _features_for_zoom(self, zoom: int) -> List[Dict[str, Any]]:
+        """Return the precomputed feature list for a zoom level"""
+        if zoom not in self._zoom_cache:
+            self._zoom_cache[zoom] = self._build_features(zoom)
+        return self._zoom_cache[zoom]
+
+    def get_collection(self, zoom: int, bbox: Optional[Tuple[float, float, float, float]] = None,
+                       layers: Optional[List[str]] = None) -> Tuple[str, str]:
+        """Return (json_body, etag) for the features visible at zoom inside bbox"""
+        zoom = max(MIN_ZOOM, min(MAX_ZOOM, int(zoom)))
+        if bbox is not None:
+            bbox = snap_bbox(bbox, zoom)
+        layer_key = tuple(sorted(layers)) if layers else None
+        cache_key = (zoom, bbox, layer_key)
+
+        with self._lock:
+            self._reload_if_changed()
+
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                self._response_cache.move_to_end(cache_key)
+                return cached
+
+            selected = []
+            for entry in self._features_for_zoom(zoom):
+                feature = entry['feature']
+                if layer_key and feature['properties']['layer'] not in layer_key:
+                    continue
+                if bbox is not None:
+                    west, south, east, north = entry['bounds']
+                    if east < bbox[0] or west > bbox[2] or north < bbox[1] or south > bbox[3]:
+                        continue
+                selected.append(feature)
+
+            collection = {'type': 'FeatureCollection', 'zoom': zoom, 'features': selected}
+            if bbox is not None:
+                collection['bbox'] = list(bbox)
+
+            body = json.dumps(collection, ensure_ascii=False, separators=(',', ':'))
+            etag = hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+            self._response_cache[cache_key] = (body, etag)
+            if len(self._response_cache) > self.max_cached_responses:
+                self._response_cache.popitem(last=False)
+
+            return body, etag
+
+# Global map feature index instance
+map_feature_index = MapFeatureIndex()
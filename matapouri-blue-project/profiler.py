@@ -0,0 +1,282 @@
+# Opt-in profiling. A request is profiled when it falls inside PROFILE_SAMPLE_RATE, or when
+# it carries an X-Profile header or _profile query flag equal to PROFILE_TOKEN. Without a
+# PROFILE_TOKEN the header and flag are ignored, so anonymous visitors can't switch profiling
+# on; only sampling applies. BackupManager calls made outside a profiled request are sampled
+# at PROFILE_BACKUP_SAMPLE_RATE. The last PROFILE_KEEP profiles are kept on disk so any
+# worker can serve them, as pstats or speedscope JSON; the /profiles routes require the same
+# token and are closed entirely when none is configured.
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Dict, Any, List, Optional
+
+PROFILE_ID_PATTERN = re.compile(r'^\d{8}_\d{6}_\d{6}_\d+$')
+
+# Call-tree branches below this fraction of the total are dropped from speedscope output
+SPEEDSCOPE_MIN_WEIGHT = 1e-4
+SPEEDSCOPE_MAX_DEPTH = 200
+
+
+def to_speedscope(stats: pstats.Stats, name: str) -> Dict[str, Any]:
+    """Speedscope 'sampled' profile rebuilt from a pstats caller graph.
+
+    cProfile only records time per caller/callee edge, so each function's time is split
+    among its callers in proportion to the edge times; the result is a weighted call tree
+    rather than a timeline.
+    """
+    raw = stats.stats
+    frames = []
+    frame_index = {}
+
+    def frame(func):
+        if func not in frame_index:
+            filename, line, funcname = func
+            frame_index[func] = len(frames)
+            frames.append({'name': funcname, 'file': filename, 'line': line})
+        return frame_index[func]
+
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees[caller].append((func, edge[3]))
+
+    roots = [func for func, entry in raw.items() if not entry[4]]
+    total = sum(raw[func][3] for func in roots)
+    min_weight = total * SPEEDSCOPE_MIN_WEIGHT
+    samples = []
+    weights = []
+
+    def walk(func, share, stack, on_stack):
+        cumulative = raw[func][3]
+        if cumulative <= 0 or share <= min_weight or len(stack) >= SPEEDSCOPE_MAX_DEPTH:
+            return
+        stack = stack + [frame(func)]
+        scale = share / cumulative
+        self_time = raw[func][2] * scale
+        if self_time > 0:
+            samples.append(stack)
+            weights.append(self_time)
+        on_stack.add(func)
+        for callee, edge_time in callees[func]:
+            if callee not in on_stack:
+                walk(callee, edge_time * scale, stack, on_stack)
+        on_stack.discard(func)
+
+    for func in roots:
+        walk(func, raw[func][3], [], set())
+
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'matapouri-blue profiler',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+    }
+
+
+class Profiler:
+    """cProfile capture for selected requests and BackupManager calls, kept in a bounded ring"""
+
+    def __init__(self, profile_dir: Optional[str] = None, keep: Optional[int] = None):
+        self.profile_dir = profile_dir or os.environ.get(
+            'PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'matapouri-profiles'))
+        self.keep = keep or int(os.environ.get('PROFILE_KEEP', '50'))
+        self.sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+        self.backup_sample_rate = float(os.environ.get('PROFILE_BACKUP_SAMPLE_RATE', '0'))
+        self.token = os.environ.get('PROFILE_TOKEN')
+        self._local = threading.local()
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+
+    def authorized(self, req) -> bool:
+        """True if the request carries PROFILE_TOKEN in X-Profile or _profile; always False without a token"""
+        if not self.token:
+            return False
+        flag = req.headers.get('X-Profile')
+        if flag is None:
+            flag = req.args.get('_profile')
+        return flag is not None and hmac.compare_digest(flag.encode('utf-8'), self.token.encode('utf-8'))
+
+    def _requested(self, req) -> bool:
+        """True if the request carries the profiling token, or is picked by the sample rate"""
+        if self.authorized(req):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _start(self) -> Optional[cProfile.Profile]:
+        """Enable a profiler for this thread unless one is already running"""
+        if getattr(self._local, 'active', None) is not None:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (or debugger) already owns the hook
+            return None
+        self._local.active = profile
+        self._local.started = time.perf_counter()
+        return profile
+
+    def _stop(self, kind: str, label: str, details: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Disable this thread's profiler and store the result; returns the profile id"""
+        profile = getattr(self._local, 'active', None)
+        if profile is None:
+            return None
+        profile.disable()
+        duration = time.perf_counter() - self._local.started
+        self._local.active = None
+
+        try:
+            return self._save(profile, kind, label, duration, details or {})
+        except Exception as e:
+            print(f"Profile save error: {e}")
+            return None
+
+    def _next_id(self) -> str:
+        """Sortable id, unique across threads and worker processes"""
+        with self._counter_lock:
+            self._counter += 1
+            counter = self._counter
+        return f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{os.getpid()}{counter:04d}"
+
+    def _save(self, profile: cProfile.Profile, kind: str, label: str,
+              duration: float, details: Dict[str, Any]) -> str:
+        """Write the pstats dump and its metadata, then trim the ring"""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profile_id = self._next_id()
+        base = os.path.join(self.profile_dir, profile_id)
+
+        profile.dump_stats(f"{base}.prof.tmp")
+        os.replace(f"{base}.prof.tmp", f"{base}.prof")
+
+        meta = {
+            'id': profile_id,
+            'kind': kind,
+            'label': label,
+            'duration_ms': round(duration * 1000, 2),
+            'created': datetime.now().isoformat(),
+            'pid': os.getpid(),
+        }
+        meta.update(details)
+        with open(f"{base}.json.tmp", 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(f"{base}.json.tmp", f"{base}.json")
+
+        self._trim()
+        return profile_id
+
+    def _trim(self):
+        """Delete the oldest profiles beyond the ring size"""
+        ids = sorted(n[:-5] for n in os.listdir(self.profile_dir) if n.endswith('.json'))
+        for profile_id in ids[:-self.keep]:
+            for suffix in ('.json', '.prof'):
+                try:
+                    os.remove(os.path.join(self.profile_dir, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    @contextmanager
+    def capture(self, kind: str, label: str):
+        """Profile the enclosed block unless this thread is already being profiled"""
+        started = self._start()
+        try:
+            yield
+        finally:
+            if started is not None:
+                self._stop(kind, label)
+
+    def profiled(self, label: str):
+        """Decorator sampling calls at PROFILE_BACKUP_SAMPLE_RATE; calls inside a profiled request are already covered"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.backup_sample_rate <= 0 or random.random() >= self.backup_sample_rate:
+                    return func(*args, **kwargs)
+                with self.capture('backup', label):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def init_app(self, app):
+        """Register request hooks; unprofiled requests cost one header and one query lookup"""
+        from flask import request
+
+        @app.before_request
+        def _profile_start():
+            if self._requested(request):
+                self._start()
+
+        @app.after_request
+        def _profile_finish(response):
+            if getattr(self._local, 'active', None) is not None:
+                profile_id = self._stop('request', f"{request.method} {request.path}", {
+                    'method': request.method,
+                    # Not full_path: the query string may carry the profiling token
+                    'path': request.path,
+                    'status': response.status_code,
+                })
+                if profile_id:
+                    response.headers['X-Profile-Id'] = profile_id
+            return response
+
+        @app.teardown_request
+        def _profile_teardown(error):
+            # after_request is skipped when the view raised; still keep the profile
+            if getattr(self._local, 'active', None) is not None:
+                self._stop('request', f"{request.method} {request.path}", {
+                    'method': request.method,
+                    'path': request.path,
+                    'status': 500,
+                    'error': str(error) if error else None,
+                })
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Stored profile metadata, newest first"""
+        if not os.path.isdir(self.profile_dir):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.profile_dir), reverse=True):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.profile_dir, name), 'r', encoding='utf-8') as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def profile_path(self, profile_id: str) -> Optional[str]:
+        """Path of a stored pstats dump, or None for unknown or malformed ids"""
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = os.path.join(self.profile_dir, f"{profile_id}.prof")
+        return path if os.path.exists(path) else None
+
+    def get_speedscope(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """A stored profile converted to speedscope JSON"""
+        path = self.profile_path(profile_id)
+        if path is None:
+            return None
+        return to_speedscope(pstats.Stats(path), profile_id)
+
+# Global profiler instance
+profiler = Profiler()
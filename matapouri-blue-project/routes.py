@@ -1,29 +1,18 @@
 import os
 from flask import render_template, send_from_directory, request, redirect, url_for, jsonify
 from app import app
+from admission import admission
 
 @app.route('/')
 def index():
     """Main homepage with image carousel"""
     # Load philosophy content from file
-    import json
-    
-    philosophy_data = {
-        'title': 'Our name, our philosophy',
-        'text1': 'Inspired by the philosophy of Japanese Bonsai, the Matapouri Blue Totara found on our land, and the deep blue of the lake, our name and place reflect the values we hold dear.',
-        'text2': 'Life isn\'t always easy—but with strong roots, a sense of direction, and the courage to shape new growth, we believe each person can define their own path and future.'
-    }
-    
-    if os.path.exists('static/philosophy_content.json'):
-        try:
-            with open('static/philosophy_content.json', 'r') as f:
-                philosophy_data = json.load(f)
-        except:
-            pass
+    from content_store import philosophy_document
+    philosophy_data, _ = philosophy_document.get()
     
     return render_template('index.html', 
-                         thunderforest_api_key=os.environ.get('THUNDERFOREST_API_KEY'),
-                         philosophy=philosophy_data)
+                         philosophy=philosophy_data,
+                         inline_critical_css=True)
 
 @app.route('/about')
 def about():
@@ -85,10 +74,155 @@ def check_availability():
     """Check availability page"""
     return render_template('check_availability.html')
 
+@app.route('/api/availability')
+def api_availability():
+    """Whether each room is free for a check-in/check-out range"""
+    from availability import booking_calendar
+
+    try:
+        rooms = booking_calendar.check_availability(request.args.get('checkin'),
+                                                    request.args.get('checkout'),
+                                                    request.args.get('accommodation'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({'success': True, 'available': all(rooms.values()), 'rooms': rooms})
+
+@app.route('/api/availability/<int:year>/<int:month>')
+def api_availability_month(year, month):
+    """Month view of booked and free rooms per day"""
+    from availability import booking_calendar
+
+    if not 1 <= month <= 12:
+        return jsonify({'success': False, 'error': 'Month must be 1-12'}), 400
+    try:
+        view = booking_calendar.month_view(year, month, request.args.get('accommodation'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify(dict(view, success=True))
+
+@app.route('/api/bookings', methods=['POST'])
+@admission.limit('create-booking')
+def create_booking():
+    """Reserve dates from the check availability form"""
+    from availability import booking_calendar, BookingConflict
+
+    data = request.json or {}
+    details = {key: data.get(key, '') for key in ('name', 'email', 'phone', 'guests', 'message')}
+    try:
+        booking = booking_calendar.create_booking(data.get('checkin'), data.get('checkout'),
+                                                  data.get('accommodation'), details)
+    except BookingConflict as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Booking failed: {e}'}), 500
+
+    return jsonify({'success': True, 'booking': booking}), 201
+
+@app.route('/api/bookings/<booking_id>', methods=['DELETE'])
+def cancel_booking(booking_id):
+    """Cancel a booking and free its dates"""
+    from availability import booking_calendar
+
+    if not booking_calendar.cancel_booking(booking_id):
+        return jsonify({'success': False, 'error': 'Booking not found'}), 404
+    return jsonify({'success': True})
+
+@app.route('/availability.ics')
+def availability_ical():
+    """iCal feed of booked dates"""
+    from availability import booking_calendar
+
+    try:
+        feed = booking_calendar.export_ical(request.args.get('accommodation'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return app.response_class(feed, mimetype='text/calendar')
+
 @app.route('/discover')
 def discover():
     """Discover page"""
-    return render_template('discover.html', thunderforest_api_key=os.environ.get('THUNDERFOREST_API_KEY'))
+    return render_template('discover.html')
+
+@app.route('/api/map-features')
+def map_features():
+    """Kinloch map features as GeoJSON for the requested zoom and viewport"""
+    import math
+    from map_features import map_feature_index
+
+    try:
+        zoom = int(request.args.get('zoom', 14))
+        bbox = None
+        if request.args.get('bbox'):
+            west, south, east, north = [float(v) for v in request.args['bbox'].split(',')]
+            bbox = (west, south, east, north)
+            if not all(math.isfinite(v) for v in bbox):
+                raise ValueError('bbox values must be finite')
+        layers = [l for l in request.args.get('layers', '').split(',') if l] or None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'zoom must be an integer and bbox west,south,east,north'}), 400
+
+    body, etag = map_feature_index.get_collection(zoom, bbox, layers)
+
+    response = app.response_class(body, mimetype='application/geo+json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
+
+@app.route('/api/weather')
+def weather():
+    """Cached Open-Meteo forecast for Kinloch used by the map weather widget"""
+    from weather_proxy import weather_proxy
+
+    try:
+        forecast = weather_proxy.get_forecast()
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Weather unavailable: {e}'}), 502
+
+    response = app.response_class(forecast['body'], mimetype='application/json')
+    response.headers['X-Cache'] = forecast['cache']
+    response.cache_control.public = True
+    response.cache_control.max_age = max(0, int(weather_proxy.ttl - forecast['age']))
+    return response
+
+@app.route('/tiles/<int:z>/<int:x>/<int:y>.png')
+def map_tile(z, x, y):
+    """Thunderforest map tile served from the local tile cache, limited to the Kinloch map area"""
+    from tile_cache import tile_cache, in_service_area
+
+    # Only the tiles our map shows, so the proxy can't spend the API key or fill the cache elsewhere
+    if not in_service_area(z, x, y):
+        return jsonify({'success': False, 'error': 'Tile out of range'}), 404
+
+    data, cache_status = tile_cache.get_tile(z, x, y)
+    if data is None:
+        return jsonify({'success': False, 'error': f'Tile unavailable: {cache_status}'}), 502
+
+    response = app.response_class(data, mimetype='image/png')
+    response.headers['X-Cache'] = cache_status
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response
+
+@app.route('/api/gallery')
+def gallery():
+    """Carousel images with dimensions, dominant colour and blur-up placeholders"""
+    import hashlib
+    import json
+    from gallery import gallery_manifest
+
+    body = json.dumps({'success': True, 'images': gallery_manifest.get_images()})
+
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(hashlib.sha256(body.encode('utf-8')).hexdigest()[:16])
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
 
 @app.route('/contact')
 def contact():
@@ -120,15 +254,85 @@ def philosophy_text_editor():
     """Philosophy text editor"""
     return send_from_directory('.', 'philosophy_editor.html')
 
+def _philosophy_response(content, version, status=200):
+    """JSON response carrying philosophy content and its version as an ETag"""
+    response = jsonify({'success': True, 'content': content, 'version': version})
+    response.status_code = status
+    response.set_etag(version)
+    return response
+
+def _philosophy_conflict(conflict):
+    """409 response telling a stale editor the current version to rebase onto"""
+    response = jsonify({
+        'success': False,
+        'error': 'The text was changed by someone else. Reload to get the latest version.',
+        'version': conflict.current_version,
+        'content': conflict.current_content
+    })
+    response.status_code = 409
+    response.set_etag(conflict.current_version)
+    return response
+
+def _if_match_version():
+    """Version from the If-Match header, or None if the client sent none"""
+    if not request.if_match:
+        return None
+    return next(iter(request.if_match.as_set()), None)
+
+def _if_match_required():
+    """428 response for content writes sent without the version they were based on"""
+    return jsonify({'success': False, 'error': 'If-Match header with the content version is required'}), 428
+
+@app.route('/api/content/philosophy', methods=['GET'])
+def get_philosophy_content():
+    """Current philosophy text with its version"""
+    from content_store import philosophy_document
+    content, version = philosophy_document.get()
+    return _philosophy_response(content, version).make_conditional(request)
+
+@app.route('/api/content/philosophy', methods=['PATCH'])
+def patch_philosophy_content():
+    """Apply a small text diff to the philosophy text, rejecting stale versions"""
+    from content_store import philosophy_document, VersionConflict
+
+    base_version = _if_match_version()
+    if base_version is None:
+        return _if_match_required()
+
+    data = request.json or {}
+    try:
+        content, version = philosophy_document.patch(base_version, data.get('patches', {}))
+    except VersionConflict as e:
+        return _philosophy_conflict(e)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    from backup_system import backup_manager
+    backup_manager.backup_philosophy_content(
+        title=content.get('title', ''),
+        text1=content.get('text1', ''),
+        text2=content.get('text2', '')
+    )
+
+    return _philosophy_response(content, version)
+
 @app.route('/save-philosophy', methods=['POST'])
 def save_philosophy():
     """Save philosophy text to JSON file and backup to Supabase"""
+    from content_store import philosophy_document, VersionConflict
+    
+    base_version = _if_match_version()
+    if base_version is None:
+        return _if_match_required()
+    
     try:
         data = request.json
         
-        # Save to JSON file (local storage)
-        with open('static/philosophy_content.json', 'w') as f:
-            json.dump(data, f, indent=2)
+        # Save to JSON file (local storage), refusing stale writes
+        try:
+            _, version = philosophy_document.put(data, base_version)
+        except VersionConflict as e:
+            return _philosophy_conflict(e)
         
         # Create backup
         from backup_system import backup_manager
@@ -138,7 +342,7 @@ def save_philosophy():
             text2=data.get('text2', '')
         )
         
-        result = {'success': True}
+        result = {'success': True, 'version': version}
         if backup_success:
             result['backup'] = 'Content backed up to file successfully'
         else:
@@ -158,11 +362,12 @@ def backup_dashboard():
                          backups=backups)
 
 @app.route('/create-backup', methods=['POST'])
+@admission.limit('create-backup')
 def create_backup():
     """Create a full project backup"""
     try:
         from backup_system import backup_manager
-        success = backup_manager.backup_project_files()
+        success = backup_manager.backup_project_files() and backup_manager.backup_content_database()
         
         if success:
             return jsonify({'success': True, 'message': 'Project backup created successfully'})
@@ -172,6 +377,7 @@ def create_backup():
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/download-project')
+@admission.limit('download-project')
 def download_project():
     """Download project as zip file for GitHub upload"""
     import zipfile
@@ -200,7 +406,7 @@ def download_project():
         # Add backup files
         if os.path.exists('backups'):
             for file in os.listdir('backups'):
-                if file.endswith('.json'):
+                if file.endswith(('.json', '.snap')):
                     files_to_zip.append(f'backups/{file}')
         
         # Add attached assets (sample)
@@ -226,6 +432,7 @@ def download_project():
         return f"Error creating zip: {e}", 500
 
 @app.route('/push-to-github', methods=['POST'])
+@admission.limit('push-to-github')
 def push_to_github():
     """Push project changes to GitHub automatically"""
     import subprocess
@@ -307,6 +514,62 @@ def push_to_github():
     except Exception as e:
         return jsonify({'success': False, 'error': f'Push failed: {e}'})
 
+@app.route('/admission-stats')
+def admission_stats():
+    """Concurrency and rate limit counters for the expensive endpoints"""
+    return jsonify({'success': True, 'endpoints': admission.get_stats()})
+
+@app.route('/compression-stats')
+def compression_stats():
+    """Compression settings and compressed-body cache counters"""
+    from compression import compressor
+    return jsonify({'success': True, 'compression': compressor.get_stats()})
+
+def _profiles_forbidden():
+    """403 unless the request carries PROFILE_TOKEN (X-Profile header or _profile flag)"""
+    from profiler import profiler
+    if profiler.authorized(request):
+        return None
+    return jsonify({'success': False, 'error': 'Profiling token required'}), 403
+
+@app.route('/profiles')
+def list_profiles():
+    """Most recent request and backup profiles"""
+    from profiler import profiler
+    forbidden = _profiles_forbidden()
+    if forbidden:
+        return forbidden
+    return jsonify({'success': True, 'profiles': profiler.list_profiles()})
+
+@app.route('/profiles/<profile_id>.prof')
+def download_profile(profile_id):
+    """Download a profile in pstats format (python -m pstats, snakeviz)"""
+    from flask import send_file
+    from profiler import profiler
+    forbidden = _profiles_forbidden()
+    if forbidden:
+        return forbidden
+    path = profiler.profile_path(profile_id)
+    if path is None:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    return send_file(path, mimetype='application/octet-stream',
+                     as_attachment=True, download_name=f"{profile_id}.prof")
+
+@app.route('/profiles/<profile_id>.speedscope.json')
+def download_profile_speedscope(profile_id):
+    """Download a profile for https://www.speedscope.app"""
+    import json
+    from profiler import profiler
+    forbidden = _profiles_forbidden()
+    if forbidden:
+        return forbidden
+    data = profiler.get_speedscope(profile_id)
+    if data is None:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    response = app.response_class(json.dumps(data), mimetype='application/json')
+    response.headers['Content-Disposition'] = f'attachment; filename="{profile_id}.speedscope.json"'
+    return response
+
 @app.route('/apply-css', methods=['POST'])
 def apply_css():
     """Apply CSS changes to the website"""
@@ -316,7 +579,13 @@ def apply_css():
             # Write CSS to a temp file or apply directly
             with open('static/css/text_editor_generated.css', 'w') as f:
                 f.write(css_content)
-            return jsonify({'success': True})
+            
+            # Rebuild the merged bundle so the change is served on the next page load
+            from css_pipeline import css_pipeline
+            manifest = css_pipeline.build()
+            if manifest is None:
+                return jsonify({'success': False, 'error': 'CSS saved but bundle rebuild failed'})
+            return jsonify({'success': True, 'bundle': manifest['bundle']})
         else:
             return jsonify({'success': False, 'error': 'No CSS content provided'})
     except Exception as e:
@@ -325,6 +594,10 @@ def apply_css():
 @app.route('/apply-philosophy-text', methods=['POST'])
 def apply_philosophy_text():
     """Apply text content changes to philosophy section"""
+    base_version = _if_match_version()
+    if base_version is None:
+        return _if_match_required()
+    
     try:
         data = request.json
         title = data.get('title', '')
@@ -333,17 +606,19 @@ def apply_philosophy_text():
         
         # Store the changes in session or database
         # For now, we'll use a simple file-based approach
-        import json
+        from content_store import philosophy_document, VersionConflict
         philosophy_data = {
             'title': title,
             'text1': text1,
             'text2': text2
         }
         
-        with open('static/philosophy_content.json', 'w') as f:
-            json.dump(philosophy_data, f)
+        try:
+            _, version = philosophy_document.put(philosophy_data, base_version)
+        except VersionConflict as e:
+            return _philosophy_conflict(e)
             
-        return jsonify({'success': True})
+        return jsonify({'success': True, 'version': version})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import struct
+import zlib
+from typing import Dict, Any, Iterator, Optional
+
+# File layout:
+#   header  b'MBSNAP1\n'
+#   entries one raw-deflate stream per file, back to back
+#   index   JSON {'timestamp', 'backup_type', 'files': {path: {offset, length, size, sha256}}}
+#   footer  struct FOOTER_FORMAT: magic, index offset, index length
+HEADER_MAGIC = b'MBSNAP1\n'
+FOOTER_MAGIC = b'MBSNIDX1'
+FOOTER_FORMAT = '<8sQQ'
+FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+
+CHUNK_SIZE = 64 * 1024
+
+# Tail read when opening; covers the footer and the index of any typical snapshot in one read
+TAIL_READ_SIZE = 64 * 1024
+
+
+class SnapshotFormatError(Exception):
+    """Raised when a file is not a valid snapshot archive"""
+
+
+class SnapshotWriter:
+    """Writes a snapshot archive in a single streaming pass, holding one chunk in memory at a time"""
+
+    def __init__(self, path: str, metadata: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self.files = {}
+        self._tmp_path = f"{path}.tmp"
+        self._f = open(self._tmp_path, 'wb')
+        self._f.write(HEADER_MAGIC)
+
+    def add_file(self, name: str, source_path: str):
+        """Compress a file from disk into the archive"""
+        with open(source_path, 'rb') as src:
+            self.add_stream(name, iter(lambda: src.read(CHUNK_SIZE), b''))
+
+    def add_stream(self, name: str, chunks: Iterator[bytes]):
+        """Compress an iterable of byte chunks into the archive as one entry"""
+        offset = self._f.tell()
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        digest = hashlib.sha256()
+        size = 0
+
+        for chunk in chunks:
+            digest.update(chunk)
+            size += len(chunk)
+            self._f.write(compressor.compress(chunk))
+        self._f.write(compressor.flush())
+
+        self.files[name] = {
+            'offset': offset,
+            'length': self._f.tell() - offset,
+            'size': size,
+            'sha256': digest.hexdigest(),
+        }
+
+    def close(self):
+        """Write the index and footer, then move the archive into place"""
+        if self._f.closed:
+            return
+        index = dict(self.metadata, files=self.files)
+        index_bytes = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        index_offset = self._f.tell()
+        self._f.write(index_bytes)
+        self._f.write(struct.pack(FOOTER_FORMAT, FOOTER_MAGIC, index_offset, len(index_bytes)))
+        self._f.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard a partially written archive"""
+        if not self._f.closed:
+            self._f.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class SnapshotReader:
+    """Reads single files out of a snapshot archive using the footer index"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, 'rb')
+        try:
+            self.index = self._read_index()
+        except Exception:
+            self._f.close()
+            raise
+
+    def _read_index(self) -> Dict[str, Any]:
+        """Load the index from the tail of the archive"""
+        file_size = self._f.seek(0, os.SEEK_END)
+        if file_size < len(HEADER_MAGIC) + FOOTER_SIZE:
+            raise SnapshotFormatError(f"{self.path} is too small to be a snapshot archive")
+
+        tail_size = min(file_size, TAIL_READ_SIZE)
+        self._f.seek(file_size - tail_size)
+        tail = self._f.read(tail_size)
+
+        magic, index_offset, index_length = struct.unpack(FOOTER_FORMAT, tail[-FOOTER_SIZE:])
+        if magic != FOOTER_MAGIC:
+            raise SnapshotFormatError(f"{self.path} has no snapshot index footer")
+
+        tail_start = file_size - tail_size
+        if index_offset >= tail_start:
+            index_bytes = tail[index_offset - tail_start:index_offset - tail_start + index_length]
+        else:
+            self._f.seek(index_offset)
+            index_bytes = self._f.read(index_length)
+        return json.loads(index_bytes)
+
+    @property
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        return self.index['files']
+
+    def read(self, name: str, verify: bool = True) -> bytes:
+        """Return the contents of one file with a single seek and read"""
+        entry = self.files.get(name)
+        if entry is None:
+            raise KeyError(name)
+
+        self._f.seek(entry['offset'])
+        data = zlib.decompress(self._f.read(entry['length']), -15)
+
+        if verify and hashlib.sha256(data).hexdigest() != entry['sha256']:
+            raise SnapshotFormatError(f"Checksum mismatch for {name} in {self.path}")
+        return data
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,20 +1,8 @@
 // Image Carousel Functionality
 class ImageCarousel {
     constructor() {
-        this.images = [
-            '/static/images/3_lake_1752487455279.jpeg',
-            '/static/images/Whang stream_1752715224981.jpeg',
-            '/static/images/0_Blue_1752487455279.jpeg',
-            '/static/images/1_Zen_1752487455279.jpeg',
-            '/static/images/2_studio_1752487455279.jpeg',
-            '/static/images/4_bridge_1752487455279.jpeg',
-            '/static/images/Garden_1752715224980.jpeg',
-            '/static/images/Spooky Forrest_1752715224981.jpeg',
-            '/static/images/IMG_9564_1752715224981.jpeg',
-            '/static/images/IMG_9553_1752715224981.jpeg',
-            '/static/images/Lounge studio_1752715224981.jpeg',
-            '/static/images/Blue heron_1752719468329.jpeg'
-        ];
+        // Filled from /api/gallery: src, alt, width, height, color and a blurred placeholder
+        this.images = [];
         this.currentIndex = 0;
         this.interval = 10000; // 10 seconds
         this.container = null;
@@ -22,40 +10,74 @@ class ImageCarousel {
         this.timer = null;
     }
 
-    init() {
+    async init() {
         this.container = document.getElementById('carousel-container');
         if (!this.container) return;
 
+        try {
+            const response = await fetch('/api/gallery');
+            const data = await response.json();
+            this.images = data.images || [];
+        } catch (error) {
+            console.warn('Gallery manifest unavailable:', error);
+            return;
+        }
+        if (this.images.length === 0) return;
+
         this.createImageElements();
         this.startCarousel();
         this.addEventListeners();
     }
 
     createImageElements() {
-        this.images.forEach((imageSrc, index) => {
+        this.images.forEach((image, index) => {
             const img = document.createElement('img');
-            img.src = imageSrc;
-            img.alt = `Matapouri Blue Image ${index + 1}`;
+            img.alt = image.alt || `Matapouri Blue Image ${index + 1}`;
             img.className = 'carousel-image';
-            img.loading = 'lazy';
-            
-            // Add error handling for missing images
+            img.decoding = 'async';
+
+            // Intrinsic size lets the browser reserve the box before any bytes arrive
+            if (image.width && image.height) {
+                img.width = image.width;
+                img.height = image.height;
+            }
+
+            // Dominant colour and blurred placeholder show until the full image decodes
+            if (image.color) {
+                img.style.backgroundColor = image.color;
+            }
+            if (image.lqip) {
+                img.style.backgroundImage = `url("${image.lqip}")`;
+                img.style.backgroundSize = 'cover';
+                img.style.backgroundPosition = 'center';
+            }
+
+            img.onload = () => {
+                img.style.backgroundImage = '';
+            };
             img.onerror = () => {
-                console.warn(`Image not found: ${imageSrc}`);
-                img.style.background = 'linear-gradient(135deg, #87CEEB, #ADD8E6)';
-                img.style.display = 'flex';
-                img.style.alignItems = 'center';
-                img.style.justifyContent = 'center';
-                img.innerHTML = '<span style="color: rgba(255,255,255,0.7); font-size: 1.2rem;">Image Loading...</span>';
+                console.warn(`Image not found: ${image.src}`);
             };
 
             if (index === 0) {
                 img.classList.add('active');
+                img.fetchPriority = 'high';
             }
 
             this.container.appendChild(img);
             this.imageElements.push(img);
         });
+
+        // Only the first image is fetched up front; the rest load one step ahead of the rotation
+        this.loadImage(0);
+        this.loadImage(1 % this.images.length);
+    }
+
+    loadImage(index) {
+        const img = this.imageElements[index];
+        if (img && !img.getAttribute('src')) {
+            img.src = this.images[index].src;
+        }
     }
 
     nextImage() {
@@ -65,6 +87,10 @@ class ImageCarousel {
         // Move to next image
         this.currentIndex = (this.currentIndex + 1) % this.images.length;
         
+        // Start fetching the image after this one so it is ready in time
+        this.loadImage(this.currentIndex);
+        this.loadImage((this.currentIndex + 1) % this.images.length);
+
         // Fade in new image
         setTimeout(() => {
             this.imageElements[this.currentIndex].classList.add('active');
@@ -119,30 +145,6 @@ document.addEventListener('DOMContentLoaded', () => {
     carousel.init();
 });
 
-// Page animation utilities
-function addPageAnimations() {
-    const observerOptions = {
-        threshold: 0.1,
-        rootMargin: '0px 0px -50px 0px'
-    };
-
-    const observer = new IntersectionObserver((entries) => {
-        entries.forEach(entry => {
-            if (entry.isIntersecting) {
-                entry.target.classList.add('fade-in');
-            }
-        });
-    }, observerOptions);
-
-    // Observe all content cards
-    document.querySelectorAll('.content-card').forEach(card => {
-        observer.observe(card);
-    });
-}
-
-// Initialize animations
-document.addEventListener('DOMContentLoaded', addPageAnimations);
-
 // Parallax scrolling effect removed - philosophy section now has static positioning
 
 // Welcome section - map functionality moved to Discover page
@@ -0,0 +1,53 @@
+// Client for the versioned content API: sends only the changed part of each field,
+// guarded by If-Match so two open editors can't overwrite each other
+const ContentSync = {
+    // Single [start, end, replacement] op turning base into text, in code points to match the server
+    diff(base, text) {
+        const a = Array.from(base || '');
+        const b = Array.from(text || '');
+        let start = 0;
+        while (start < a.length && start < b.length && a[start] === b[start]) {
+            start++;
+        }
+        let endA = a.length;
+        let endB = b.length;
+        while (endA > start && endB > start && a[endA - 1] === b[endB - 1]) {
+            endA--;
+            endB--;
+        }
+        if (start === endA && start === endB) {
+            return [];
+        }
+        return [[start, endA, b.slice(start, endB).join('')]];
+    },
+
+    async load(url) {
+        const response = await fetch(url);
+        const data = await response.json();
+        return { content: data.content, version: data.version };
+    },
+
+    // Patch the fields of `updated` that differ from `base` ({content, version});
+    // resolves to the server JSON, with `conflict` set when the base version was stale
+    async save(url, base, updated) {
+        const patches = {};
+        Object.keys(updated).forEach(field => {
+            const ops = this.diff(base.content[field], updated[field]);
+            if (ops.length) {
+                patches[field] = ops;
+            }
+        });
+
+        const response = await fetch(url, {
+            method: 'PATCH',
+            headers: {
+                'Content-Type': 'application/json',
+                'If-Match': '"' + base.version + '"'
+            },
+            body: JSON.stringify({ patches: patches })
+        });
+        const data = await response.json();
+        data.conflict = response.status === 409;
+        return data;
+    }
+};
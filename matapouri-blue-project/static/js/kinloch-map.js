@@ -1,3 +1,6 @@
+// Area covered by the tile proxy, as [[south, west], [north, east]] (KINLOCH_BBOX in tile_cache.py)
+const KINLOCH_BOUNDS = [[-38.72, 175.75], [-38.62, 175.98]];
+
 class KinlochMap {
     constructor(containerId = 'map') {
         this.containerId = containerId;
@@ -15,6 +18,8 @@ class KinlochMap {
         this.taxiRouteLayeres = [];
         this.imageMarkers = [];
         this.ticked = false;
+        this.featureRequestId = 0;
+        this.elementsHidden = false;
         
         // Auto-initialize when container is provided
         if (this.containerId) {
@@ -42,15 +47,22 @@ class KinlochMap {
             touchZoom: true,
             doubleClickZoom: true,
             boxZoom: true,
-            keyboard: true
+            keyboard: true,
+            // The tile proxy only serves this area and zoom range (KINLOCH_BBOX, MIN_ZOOM in tile_cache.py)
+            minZoom: 10,
+            maxZoom: 18,
+            maxBounds: KINLOCH_BOUNDS,
+            maxBoundsViscosity: 1.0
         });
         
         console.log('KinlochMap: Map initialized successfully - v6.1 - Adjusted zoom to 14 between headlands');
 
-        // Add OpenStreetMap Cycle Map layer (Thunderforest OpenCycleMap) with trail detail
-        this.currentLayer = L.tileLayer('https://{s}.tile.thunderforest.com/cycle/{z}/{x}/{y}.png?apikey=' + window.THUNDERFOREST_API_KEY, {
+        // Add OpenStreetMap Cycle Map layer (Thunderforest OpenCycleMap) with trail detail, served through the local tile cache
+        this.currentLayer = L.tileLayer('/tiles/{z}/{x}/{y}.png', {
             attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors, &copy; <a href="https://www.thunderforest.com/">Thunderforest</a>',
+            minZoom: 10,
             maxZoom: 18,
+            bounds: KINLOCH_BOUNDS,
             opacity: 0.9
         }).addTo(this.map);
 
@@ -71,31 +83,14 @@ class KinlochMap {
             }
         }
         
-        // Initialize points of interest
-        this.initializePointsOfInterest();
-        
-        // Points of interest markers removed - only GPS image markers remain
-        
-        // Initialize track details
-        this.initializeTrackDetails();
-        
-        // Initialize water taxi routes
-        this.initializeWaterTaxiRoutes();
-        
-        // Add water taxi routes to map
-        this.addWaterTaxiRoutesToMap();
-        
-        // Add GPS images to map
-        this.addGPSImagesToMap();
-        
-        // Add track details to map
-        this.addTrackDetailsToMap();
-        
+        // Load trails, image markers, track details and water taxi routes from the server
+        this.loadFeatures();
+
+        // Refetch features for the new viewport whenever the map is panned or zoomed
+        this.map.on('moveend', () => {
+            this.loadFeatures();
+        });
 
-        
-        // For Discover page, show all map elements immediately
-        this.showMapElements();
-        
         // Trail lines removed per user request
         
         // Track details removed per user request - using original OpenStreetMap track details
@@ -120,867 +115,68 @@ class KinlochMap {
         this.setupDiscoverBoxRemoval();
     }
 
-    initializeTrails() {
-        // Authentic Great Lake Trails data with official times and distances
-        this.trails = [
-            {
-                name: "K2K Trail",
-                coordinates: [
-                    [-38.6634, 175.9200], // Kinloch start
-                    [-38.6620, 175.9150],
-                    [-38.6600, 175.9100],
-                    [-38.6580, 175.9050],
-                    [-38.6570, 175.9000],
-                    [-38.6560, 175.8950],
-                    [-38.6550, 175.8900],
-                    [-38.6540, 175.8850],
-                    [-38.6530, 175.8800],
-                    [-38.6520, 175.8750],
-                    [-38.6510, 175.8700],
-                    [-38.6500, 175.8650],
-                    [-38.6490, 175.8600],
-                    [-38.6480, 175.8550],
-                    [-38.6470, 175.8500],
-                    [-38.6460, 175.8450],
-                    [-38.6450, 175.8400],
-                    [-38.6440, 175.8350],
-                    [-38.6430, 175.8300],
-                    [-38.6420, 175.8250],
-                    [-38.6410, 175.8200],
-                    [-38.6400, 175.8150],
-                    [-38.6390, 175.8100],
-                    [-38.6380, 175.8050],
-                    [-38.6370, 175.8000],
-                    [-38.6360, 175.7950],
-                    [-38.6350, 175.7900],
-                    [-38.6340, 175.7850],
-                    [-38.6330, 175.7800],
-                    [-38.6320, 175.7750],
-                    [-38.6525, 175.9055] // Kawakawa Bay end
-                ],
-                distance: "9 km",
-                walkingTime: "2 hours",
-                cyclingTime: "1 hour 30 minutes",
-                difficulty: "Intermediate",
-                description: "Kinloch to Kawakawa Bay via Codgers Rock lookout",
-                highlights: ["Codgers Rock lookout", "Native bush", "Lake views", "Elevation gain 320m"]
-            },
-            {
-                name: "W2K Trail",
-                coordinates: [
-                    [-38.6735, 175.9205], // Whakaipo Bay start
-                    [-38.6720, 175.9180],
-                    [-38.6710, 175.9160],
-                    [-38.6700, 175.9140],
-                    [-38.6690, 175.9120],
-                    [-38.6680, 175.9100],
-                    [-38.6670, 175.9080],
-                    [-38.6660, 175.9060],
-                    [-38.6650, 175.9040],
-                    [-38.6640, 175.9020],
-                    [-38.6634, 175.9200] // Kinloch end
-                ],
-                distance: "14 km",
-                walkingTime: "4 hours 30 minutes",
-                cyclingTime: "2 hours",
-                difficulty: "Intermediate",
-                description: "Whakaipo Bay to Kinloch via Whangamata headland",
-                highlights: ["Headland views", "Tongariro National Park views", "Pumice track", "Excellent drainage"]
-            },
-            {
-                name: "Whangamata Stream Trail",
-                coordinates: [
-                    [-38.6634, 175.9200], // Kinloch start
-                    [-38.6520, 175.9260],
-                    [-38.6500, 175.9280],
-                    [-38.6480, 175.9300],
-                    [-38.6460, 175.9320],
-                    [-38.6440, 175.9340],
-                    [-38.6420, 175.9360],
-                    [-38.6400, 175.9380],
-                    [-38.6380, 175.9400],
-                    [-38.6360, 175.9420],
-                    [-38.6340, 175.9440],
-                    [-38.6320, 175.9460],
-                    [-38.6300, 175.9480],
-                    [-38.6280, 175.9500] // Whangamata Road end
-                ],
-                distance: "3 km",
-                walkingTime: "1 hour 30 minutes",
-                cyclingTime: "45 minutes",
-                difficulty: "Easy",
-                description: "Forest trail following Whangamata Stream from lake to road",
-                highlights: ["Historic water wheel", "Trout viewing", "Native forest", "Stream-side walking"]
-            },
-            {
-                name: "Otaketake Trail",
-                coordinates: [
-                    [-38.6634, 175.9200], // Kinloch start
-                    [-38.6620, 175.9180],
-                    [-38.6610, 175.9160],
-                    [-38.6600, 175.9140],
-                    [-38.6590, 175.9120],
-                    [-38.6580, 175.9100],
-                    [-38.6570, 175.9080],
-                    [-38.6560, 175.9060],
-                    [-38.6550, 175.9040],
-                    [-38.6540, 175.9020],
-                    [-38.6530, 175.9000],
-                    [-38.6520, 175.8980],
-                    [-38.6510, 175.8960],
-                    [-38.6500, 175.8940],
-                    [-38.6750, 175.8980] // Orakau carpark end
-                ],
-                distance: "12 km",
-                walkingTime: "3 hours",
-                cyclingTime: "1 hour 30 minutes",
-                difficulty: "Intermediate",
-                description: "Kinloch to Orakau carpark through native bush",
-                highlights: ["Native birdlife", "Lake Taupo viewpoints", "Forest canopy", "Stream crossings"]
-            },
-            {
-                name: "Orakau Track",
-                coordinates: [
-                    [-38.6750, 175.8980], // Orakau carpark start
-                    [-38.6720, 175.8960],
-                    [-38.6690, 175.8940],
-                    [-38.6660, 175.8920],
-                    [-38.6630, 175.8900],
-                    [-38.6600, 175.8880],
-                    [-38.6570, 175.8860],
-                    [-38.6540, 175.8840],
-                    [-38.6510, 175.8820],
-                    [-38.6480, 175.8800],
-                    [-38.6450, 175.8780],
-                    [-38.6420, 175.8760],
-                    [-38.6390, 175.8740],
-                    [-38.6360, 175.8720],
-                    [-38.6525, 175.9055] // Kawakawa Bay end
-                ],
-                distance: "10 km",
-                walkingTime: "2 hours 30 minutes",
-                cyclingTime: "1 hour 15 minutes",
-                difficulty: "Intermediate",
-                description: "Orakau carpark to Kawakawa Bay with downhill flow",
-                highlights: ["Downhill flow", "Wetlands", "Boardwalks", "Waterfalls", "160m elevation gain"]
-            },
-            {
-                name: "Waihaha Trail",
-                coordinates: [
-                    [-38.6920, 175.9050], // Waihaha River Bridge start
-                    [-38.6900, 175.9030],
-                    [-38.6880, 175.9010],
-                    [-38.6860, 175.8990],
-                    [-38.6840, 175.8970],
-                    [-38.6820, 175.8950],
-                    [-38.6800, 175.8930],
-                    [-38.6780, 175.8910],
-                    [-38.6760, 175.8890],
-                    [-38.6740, 175.8870],
-                    [-38.6720, 175.8850],
-                    [-38.6700, 175.8830],
-                    [-38.6680, 175.8810],
-                    [-38.6660, 175.8790],
-                    [-38.6640, 175.8770],
-                    [-38.6620, 175.8750],
-                    [-38.6600, 175.8730],
-                    [-38.6580, 175.8710],
-                    [-38.6560, 175.8690],
-                    [-38.6540, 175.8670],
-                    [-38.6520, 175.8650] // Kotukutuku Landing end
-                ],
-                distance: "30 km (13km Waihaha + 17km Waihora)",
-                walkingTime: "3.5 hours Waihaha section",
-                cyclingTime: "1.5 hours Waihaha section",
-                difficulty: "Intermediate",
-                description: "Most remote section with flowing corners and switchbacks",
-                highlights: ["Remote wilderness", "Flowing corners", "Switchbacks", "Waterfall finish", "Shuttle required"]
-            }
-        ];
-    }
+    async loadFeatures() {
+        // Fetch only the features inside the (padded) viewport, simplified for the current zoom
+        const bounds = this.map.getBounds().pad(0.5);
+        const params = new URLSearchParams({
+            zoom: this.map.getZoom(),
+            bbox: [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()]
+                .map(value => value.toFixed(5)).join(',')
+        });
+        const requestId = ++this.featureRequestId;
 
-    initializePointsOfInterest() {
-        // GPS-located images from uploaded files
-        this.gpsImages = [
-            {
-                name: "Canoe at K2K",
-                coordinates: [-38.664957, 175.869339],
-                image: "/attached_assets/Canoe at K2K -38.664957, 175.869339_1752636070985.jpeg",
-                description: "Canoeing at K2K trail location"
-            },
-            {
-                name: "K2K headland",
-                coordinates: [-38.67338, 175.86766],
-                image: "/attached_assets/K2K headland -38.67338, 175.86766_1752636070985.jpeg",
-                description: "Scenic headland view on K2K trail"
-            },
-            {
-                name: "K2K campsite",
-                coordinates: [-38.665705, 175.870004],
-                image: "/attached_assets/K2K campsite -38.665705, 175.870004_1752636070985.jpeg",
-                description: "Camping facilities at K2K"
-            },
-            {
-                name: "Ferry grove Stream Trail",
-                coordinates: [-38.652070, 175.925961],
-                image: "/attached_assets/Ferry grove Stream Trail -38.652070, 175.925961_1752636070985.jpeg",
-                description: "Ferry grove on stream trail"
-            },
-            {
-                name: "General Store",
-                coordinates: [-38.662909, 175.919794],
-                image: "/attached_assets/General Store -38.662909, 175.919794_1752636070985.jpeg",
-                description: "Local general store"
-            },
-            {
-                name: "Paddle K2K headland",
-                coordinates: [-38.66611, 175.88317],
-                image: "/attached_assets/Paddle K2K headland -38.66611, 175.88317_1752636070985.jpeg",
-                description: "Paddling at K2K headland"
-            },
-            {
-                name: "K2K rocks",
-                coordinates: [-38.66611, 175.88317],
-                image: "/attached_assets/K2K rocks -38.66611, 175.88317_1752636070985.jpeg",
-                description: "Rocky formations at K2K"
-            },
-            {
-                name: "Lookout k2k",
-                coordinates: [-38.661847, 175.878319],
-                image: "/attached_assets/Lookout k2k  -38.66288, 175.87418_1752636070985.jpeg",
-                description: "Scenic lookout on K2K trail"
-            },
-            {
-                name: "Camping at k2k",
-                coordinates: [-38.665967, 175.870165],
-                image: "/attached_assets/Camping at k2k -38.665967, 175.870165_1752636070985.jpeg",
-                description: "Camping area at K2K"
-            },
-            {
-                name: "Blue Heron",
-                coordinates: [-38.659732, 175.913504],
-                image: "/attached_assets/Blue Heron -38.659732, 175.913504_1752636070985.jpeg",
-                description: "Blue heron wildlife spotting"
-            },
-
-            {
-                name: "Forrest Whangamata Stream",
-                coordinates: [-38.643665, 175.928364],
-                image: "/attached_assets/Forrest Whangamata Stream  -38.643665, 175.928364_1752636070985.jpeg",
-                description: "Forest section of Whangamata Stream"
-            },
-            {
-                name: "Crystal clear water",
-                coordinates: [-38.66005, 175.90309],
-                image: "/attached_assets/Crystal clear water-38.66005, 175.90309_1752636070985.jpeg",
-                description: "Crystal clear lake water"
-            },
-            {
-                name: "K2K riding",
-                coordinates: [-38.657763, 175.910039],
-                image: "/attached_assets/K2K riding. -38.657763, 175.910039_1752636070985.jpeg",
-                description: "Mountain biking on K2K trail"
-            },
-            {
-                name: "K2K cliffs",
-                coordinates: [-38.667619, 175.868867],
-                image: "/attached_assets/K2K cliffs -38.667619, 175.868867_1752636070985.jpeg",
-                description: "Cliff formations along K2K"
-            },
-            {
-                name: "Lookout secret bay",
-                coordinates: [-38.657792, 175.897508],
-                image: "/attached_assets/Lookout secret bay -38.657792, 175.897508_1752636070985.jpeg",
-                description: "Secret bay lookout point"
-            },
-            {
-                name: "K2K to beach",
-                coordinates: [-38.658161, 175.910881],
-                image: "/attached_assets/K2K to beach -38.658161, 175.910881_1752636070986.jpeg",
-                description: "K2K trail access to beach"
-            },
-            {
-                name: "Hidden valley K2K",
-                coordinates: [-38.661587, 175.875535],
-                image: "/attached_assets/Hidden valley K2K 1 -38.661587, 175.875535_1752636070986.jpeg",
-                description: "Hidden valley on K2K trail"
-            },
-            {
-                name: "Autumn Whangamata Stream Trail",
-                coordinates: [-38.643029, 175.928423],
-                image: "/attached_assets/Autumn Whangamata Stream Trail -38.643029, 175.928423_1752636070986.jpeg",
-                description: "Autumn colors on Whangamata Stream Trail"
-            },
-            {
-                name: "Reef",
-                coordinates: [-38.65984, 175.89716],
-                image: "/attached_assets/Reef -38.65984, 175.89716_1752636070986.jpeg",
-                description: "Underwater reef formation"
-            },
-            {
-                name: "Whangamata Stream Trail",
-                coordinates: [-38.650838, 175.926068],
-                image: "/attached_assets/Whangamata Stream Trail -38.650838, 175.926068_1752636232614.jpeg",
-                description: "Main Whangamata Stream Trail"
-            },
-            {
-                name: "Secret beach",
-                coordinates: [-38.658689, 175.903392],
-                image: "/attached_assets/Secret beach -38.658689, 175.903392_1752636232614.jpeg",
-                description: "Hidden beach location"
-            },
-            {
-                name: "Water Taxi",
-                coordinates: [-38.666216, 175.869876],
-                image: "/attached_assets/Water Taxi -38.666216, 175.869876_1752636232615.jpeg",
-                description: "Water taxi pickup point"
-            },
-            {
-                name: "Water Wheel",
-                coordinates: [-38.652656, 175.925255],
-                image: "/attached_assets/Whang water wheel -38.652656, 175.925255_1752636232615.jpeg",
-                description: "Historic water wheel on Whangamata Stream"
-            },
-            {
-                name: "Secret beach 2",
-                coordinates: [-38.658232, 175.901864],
-                image: "/attached_assets/Secret beach 2 -38.658232, 175.901864_1752636232615.jpeg",
-                description: "Another hidden beach location"
-            },
-            {
-                name: "Otaketake Lookout",
-                coordinates: [-38.652639, 175.901976],
-                image: "/attached_assets/Otaketake Lookout -38.652639, 175.901976_1752650694790.jpeg",
-                description: "Scenic lookout at Otaketake"
-            },
-            {
-                name: "Headland lookout 4",
-                coordinates: [-38.69355, 175.92276],
-                image: "/attached_assets/Headland lookout 4 -38.69355, 175.92276_1752650694790.jpeg",
-                description: "Fourth headland lookout viewpoint"
-            },
-            {
-                name: "Kawakawa Bay shelter",
-                coordinates: [-38.6653687, 175.8701089],
-                image: "/attached_assets/Kawakawa Bay shelter -38.6653687, 175.8701089_1752650694790.jpeg",
-                description: "Shelter at Kawakawa Bay"
-            },
-            {
-                name: "First K2K bridge",
-                coordinates: [-38.657325, 175.902985],
-                image: "/attached_assets/First K2K bridge -38.657325, 175.902985_1752650694790.jpeg",
-                description: "First bridge on K2K trail"
-            },
-            {
-                name: "Headland loop lookout 2",
-                coordinates: [-38.69392, 175.90686],
-                image: "/attached_assets/Headland loop lookout 2 -38.69392, 175.90686_1752650694790.jpeg",
-                description: "Second headland loop lookout"
-            },
-            {
-                name: "Headland Loop Sign",
-                coordinates: [-38.689873, 175.918365],
-                image: "/attached_assets/Headland Loop Sign -38.689873, 175.918365_1752650694790.jpeg",
-                description: "Trail sign for headland loop"
-            },
-            {
-                name: "Whangamata Bay",
-                coordinates: [-38.66353, 175.91364],
-                image: "/attached_assets/Whangamata Bay -38.66353, 175.91364_1752650694790.jpeg",
-                description: "Beautiful Whangamata Bay view"
-            },
-            {
-                name: "K2K bay waters edge",
-                coordinates: [-38.665822, 175.869972],
-                image: "/attached_assets/K2K bay waters edge -38.665822, 175.869972_1752650694790.jpeg",
-                description: "Waters edge at K2K bay"
-            },
-            {
-                name: "W2K Start Headland Loop",
-                coordinates: [-38.689831, 175.918128],
-                image: "/attached_assets/W2K Start Headland Loop -38.689831, 175.918128_1752650694790.jpeg",
-                description: "Starting point of W2K headland loop"
-            },
-            {
-                name: "Headland loop Lookout 1",
-                coordinates: [-38.68690, 175.91109],
-                image: "/attached_assets/Headland loop Lookout 1 -38.68690, 175.91109_1752650694790.jpeg",
-                description: "First headland loop lookout"
-            },
-            {
-                name: "Headland loop lookout 3",
-                coordinates: [-38.69988, 175.90957],
-                image: "/attached_assets/Headland loop lookout 3 -38.69988, 175.90957_1752650694790.jpeg",
-                description: "Third headland loop lookout"
-            }
-        ];
-
-        // Points of interest with facilities and services
-        this.pointsOfInterest = [
-            {
-                name: "General Store",
-                coordinates: [-38.662909, 175.919794],
-                type: "store",
-                description: "Local general store for supplies and refreshments"
-            },
-            {
-                name: "Kinloch Golf Club (Public)",
-                coordinates: [-38.6634, 175.9200],
-                type: "golf_public",
-                description: "18-hole championship golf course open to public"
-            },
-            {
-                name: "Kinloch Lodge Golf Course (Private)",
-                coordinates: [-38.6640, 175.9180],
-                type: "golf_private",
-                description: "Private luxury golf course and lodge"
-            },
-            {
-                name: "Whakaiapo Campsite",
-                coordinates: [-38.6735, 175.9205],
-                type: "camping",
-                description: "DOC campsite at Whakaiapo Bay"
-            },
-            {
-                name: "Kawakawa Bay Campsite",
-                coordinates: [-38.6525, 175.9055],
-                type: "camping",
-                description: "DOC campsite at Kawakawa Bay"
-            },
-            {
-                name: "Rock Climbing Kawakawa Bay",
-                coordinates: [-38.6500, 175.9040],
-                type: "climbing",
-                description: "Popular rock climbing area at Kawakawa Bay"
-            },
-            {
-                name: "Rock Climbing W2K Track Start",
-                coordinates: [-38.6735, 175.9205],
-                type: "climbing",
-                description: "Rock climbing area near W2K track start"
-            },
-            {
-                name: "Whangamata Stream Water Wheel",
-                coordinates: [-38.652656, 175.925255],
-                type: "historic",
-                description: "Historic water wheel with trout viewing channel"
-            },
-            {
-                name: "Trout Nursery",
-                coordinates: [-38.6520, 175.9260],
-                type: "wildlife",
-                description: "Trout spawning area in Whangamata Stream"
-            },
-            {
-                name: "Seven Oaks Access Track",
-                coordinates: [-38.6580, 175.9120],
-                type: "access",
-                description: "Access track from Seven Oaks to K2K trail"
-            }
-        ];
-
-        // Water taxi routes with costs and times
-        this.waterTaxiRoutes = [
-            {
-                name: "Kinloch to Kawakawa Bay",
-                coordinates: [
-                    [-38.6634, 175.9200], // Kinloch Marina
-                    [-38.6620, 175.9180],
-                    [-38.6610, 175.9150],
-                    [-38.6600, 175.9120],
-                    [-38.6590, 175.9090],
-                    [-38.6580, 175.9060],
-                    [-38.6570, 175.9030],
-                    [-38.6560, 175.9000],
-                    [-38.6550, 175.8970],
-                    [-38.6540, 175.8940],
-                    [-38.6530, 175.8910],
-                    [-38.6525, 175.9055] // Kawakawa Bay
-                ],
-                duration: "20 minutes",
-                cost: "$25-35 per person",
-                operator: "Bay2Bay Water Taxi",
-                description: "Return water taxi from K2K trail end"
-            },
-            {
-                name: "Kinloch to Whakaipo Bay",
-                coordinates: [
-                    [-38.6634, 175.9200], // Kinloch Marina
-                    [-38.6650, 175.9210],
-                    [-38.6670, 175.9220],
-                    [-38.6690, 175.9230],
-                    [-38.6710, 175.9240],
-                    [-38.6735, 175.9205] // Whakaipo Bay
-                ],
-                duration: "15 minutes",
-                cost: "$20-30 per person",
-                operator: "Bay2Bay Water Taxi",
-                description: "Access to W2K trail start"
-            },
-            {
-                name: "Waihaha to Kinloch",
-                coordinates: [
-                    [-38.6520, 175.8650], // Kotukutuku Landing
-                    [-38.6540, 175.8680],
-                    [-38.6560, 175.8720],
-                    [-38.6580, 175.8760],
-                    [-38.6600, 175.8800],
-                    [-38.6620, 175.8840],
-                    [-38.6634, 175.9200] // Kinloch Marina
-                ],
-                duration: "30-40 minutes",
-                cost: "$45-60 per person",
-                operator: "Bay2Bay Water Taxi",
-                description: "Return from Waihaha-Waihora trail end"
-            }
-        ];
-    }
+        try {
+            const response = await fetch(`/api/map-features?${params}`);
+            const collection = await response.json();
 
-    initializeTrackDetails() {
-        // Track details with route timing information
-        this.trackDetails = [
-            {
-                name: "**Silver leaf Way access to K2K**",
-                coordinates: [-38.657675, 175.907582],
-                routes: [
-                    {
-                        destination: "_Route to Kawakawa Bay (One way)_",
-                        walkingTime: "2.5 hours",
-                        bikingTime: "1.5 hours",
-                        distance: "8.5 km"
-                    },
-                    {
-                        destination: "_Route to K2K Lookout_",
-                        walkingTime: "1.5 hours",
-                        bikingTime: "45 minutes",
-                        distance: "5.2 km"
-                    }
-                ],
-                description: "K2K trail access from Silver leaf Way"
-            },
-            {
-                name: "**Seven Oaks access to K2K**",
-                coordinates: [-38.658278, 175.903462],
-                routes: [
-                    {
-                        destination: "_Route to Kawakawa Bay (One way)_",
-                        walkingTime: "2.5 hours",
-                        bikingTime: "1.5 hours",
-                        distance: "8.2 km"
-                    },
-                    {
-                        destination: "_Route to K2K Lookout_",
-                        walkingTime: "1.5 hours",
-                        bikingTime: "45 minutes",
-                        distance: "5.0 km"
-                    }
-                ],
-                description: "K2K trail access from Seven Oaks"
-            },
-            {
-                name: "**Kawakawa Bay lookout**",
-                coordinates: [-38.661788, 175.878577],
-                routes: [
-                    {
-                        destination: "_Route to Kawakawa Bay (One way)_",
-                        walkingTime: "2.5 hours",
-                        bikingTime: "1.5 hours",
-                        distance: "8.5 km"
-                    }
-                ],
-                description: "Scenic lookout at Kawakawa Bay end of K2K trail"
-            },
-            {
-                name: "**Lisland Drive access to K2K**",
-                coordinates: [-38.659258, 175.912914],
-                routes: [
-                    {
-                        destination: "_Route to Kawakawa Bay (One way)_",
-                        walkingTime: "2.5 hours",
-                        bikingTime: "1.5 hours",
-                        distance: "7.8 km"
-                    }
-                ],
-                description: "K2K trail access from Lisland Drive"
-            },
-            {
-                name: "**Whangamata Stream Trail**",
-                coordinates: [-38.659445, 175.914097],
-                routes: [
-                    {
-                        destination: "_Route to Whangamata RD (One way)_",
-                        walkingTime: "1.5 hours",
-                        bikingTime: "45 minutes",
-                        distance: "4.5 km"
-                    },
-                    {
-                        destination: "_Route to water wheel (One way)_",
-                        walkingTime: "45 minutes",
-                        bikingTime: "25 minutes",
-                        distance: "2.8 km"
-                    }
-                ],
-                description: "Stream trail through native forest"
-            },
-            {
-                name: "**Water Wheel**",
-                coordinates: [-38.652667, 175.925100],
-                routes: [
-                    {
-                        destination: "_Route to Whangamata RD (One way)_",
-                        walkingTime: "1 hour",
-                        bikingTime: "30 minutes",
-                        distance: "3.2 km"
-                    }
-                ],
-                description: "Historic water wheel on Whangamata Stream"
-            },
-            {
-                name: "**Whangamata Beach and Shop location**",
-                coordinates: [-38.663087, 175.919850],
-                routes: [
-                    {
-                        destination: "_Route to Kawakawa Bay (One way)_",
-                        walkingTime: "2 hours",
-                        bikingTime: "1 hour",
-                        distance: "6.5 km"
-                    }
-                ],
-                description: "Beach access and local facilities"
-            },
-            {
-                name: "**Orakau Track**",
-                coordinates: [-38.66464, 175.86955],
-                routes: [
-                    {
-                        destination: "_Route to Whangamata RD (One way)_",
-                        walkingTime: "2.5 hours",
-                        bikingTime: "1.5 hours",
-                        distance: "8.0 km"
-                    }
-                ],
-                description: "Forest track through farmland"
-            },
-            {
-                name: "**Orakau Track End**",
-                coordinates: [-38.61543, 175.86502],
-                routes: [
-                    {
-                        destination: "_Route to Kawakawa Bay (One way)_",
-                        walkingTime: "4 hours",
-                        bikingTime: "2.5 hours",
-                        distance: "12.5 km"
-                    }
-                ],
-                description: "Southern end of Orakau Track"
-            },
-            {
-                name: "**Otaketake Track**",
-                coordinates: [-38.657289, 175.901177],
-                routes: [
-                    {
-                        destination: "_Route to Kawakawa RD (One way)_",
-                        walkingTime: "3 hours",
-                        bikingTime: "2 hours",
-                        distance: "9.5 km"
-                    }
-                ],
-                description: "Forest track with stream crossings"
-            },
-            {
-                name: "**Otaketake Track End**",
-                coordinates: [-38.62093, 175.88386],
-                routes: [
-                    {
-                        destination: "_Route to K2K (One way)_",
-                        walkingTime: "3.5 hours",
-                        bikingTime: "2.5 hours",
-                        distance: "11.0 km"
-                    }
-                ],
-                description: "Southern end of Otaketake Track"
-            },
-            {
-                name: "**Kinloch marina**",
-                coordinates: [-38.662911, 175.921149],
-                routes: [
-                    {
-                        destination: "_Route to start of W2K (One way)_",
-                        walkingTime: "15 minutes",
-                        bikingTime: "8 minutes",
-                        distance: "1.2 km"
-                    }
-                ],
-                description: "Marina with water taxi and W2K access"
-            },
-            {
-                name: "**Whakaipo Bay Track W2K**",
-                coordinates: [-38.668025, 175.924550],
-                routes: [
-                    {
-                        destination: "_Route to Whakaipo Bay (One way)_",
-                        walkingTime: "1.5 hours",
-                        bikingTime: "45 minutes",
-                        distance: "4.8 km"
-                    },
-                    {
-                        destination: "_Route to Headland Loop_",
-                        walkingTime: "2 hours",
-                        bikingTime: "1 hour",
-                        distance: "6.2 km"
-                    }
-                ],
-                description: "W2K trail start point"
-            },
-            {
-                name: "**Headland Loop intersection**",
-                coordinates: [-38.689479, 175.918053],
-                routes: [
-                    {
-                        destination: "_Route around headland and back to here_",
-                        walkingTime: "2 hours",
-                        bikingTime: "1 hour",
-                        distance: "6.5 km"
-                    },
-                    {
-                        destination: "_Route to Whakaipo Bay_",
-                        walkingTime: "1.5 hours",
-                        bikingTime: "45 minutes",
-                        distance: "4.8 km"
-                    }
-                ],
-                description: "Headland loop junction"
-            },
-            {
-                name: "**Headland Loop & W2K intersection**",
-                coordinates: [-38.693993, 175.920714],
-                routes: [
-                    {
-                        destination: "_Route back to Headland loop intersection_",
-                        walkingTime: "30 minutes",
-                        bikingTime: "15 minutes",
-                        distance: "2.1 km"
-                    },
-                    {
-                        destination: "_Route to Whakaipo Bay_",
-                        walkingTime: "2 hours",
-                        bikingTime: "1 hour",
-                        distance: "6.8 km"
-                    },
-                    {
-                        destination: "_Route back to Kinloch Marina_",
-                        walkingTime: "3 hours",
-                        bikingTime: "1.5 hours",
-                        distance: "9.5 km"
-                    }
-                ],
-                description: "Main trail intersection point"
-            },
-            {
-                name: "**Whakaiapo Bay**",
-                coordinates: [-38.68270, 175.95772],
-                routes: [
-                    {
-                        destination: "_Route back to Headland loop intersection_",
-                        walkingTime: "1.5 hours",
-                        bikingTime: "45 minutes",
-                        distance: "4.8 km"
-                    },
-                    {
-                        destination: "_Route back to Kinloch Marina_",
-                        walkingTime: "3 hours",
-                        bikingTime: "1.5 hours",
-                        distance: "9.5 km"
-                    }
-                ],
-                description: "Scenic bay at end of W2K trail"
+            // Ignore responses for viewports the user has already moved away from
+            if (requestId !== this.featureRequestId) {
+                return;
             }
-        ];
+
+            this.applyFeatures(collection);
+        } catch (error) {
+            console.error('KinlochMap: Error loading map features:', error);
+        }
     }
 
-    initializeWaterTaxiRoutes() {
-        this.waterTaxiRoutes = [
-            {
-                name: "Kinloch to Waihora Bay",
-                coordinates: [
-                    [-38.6636300, 175.9214300],
-                    [-38.6644900, 175.9190300],
-                    [-38.6663500, 175.9150600],
-                    [-38.6693600, 175.9085400],
-                    [-38.6745200, 175.8995200],
-                    [-38.6800200, 175.8892300],
-                    [-38.6817600, 175.8823600],
-                    [-38.6835700, 175.8749800],
-                    [-38.6848398, 175.8645916],
-                    [-38.6848733, 175.8548927],
-                    [-38.6852400, 175.8449400],
-                    [-38.6843700, 175.8303500],
-                    [-38.6851700, 175.8206500],
-                    [-38.6862500, 175.8123200],
-                    [-38.6865147, 175.8003902],
-                    [-38.6850408, 175.7897472],
-                    [-38.6802837, 175.7764864]
-                ],
-                description: "Water taxi route to Waihora Bay"
-            },
-            {
-                name: "Waihora Bay to Kawakawa Bay",
-                coordinates: [
-                    [-38.6802837, 175.7764864],
-                    [-38.6850408, 175.7897472],
-                    [-38.6865147, 175.8003902],
-                    [-38.6862500, 175.8123200],
-                    [-38.6851700, 175.8206500],
-                    [-38.6843700, 175.8303500],
-                    [-38.6820928, 175.8388853],
-                    [-38.6787100, 175.8461800],
-                    [-38.6750200, 175.8533000],
-                    [-38.6707686, 175.8596134],
-                    [-38.6680043, 175.8629179],
-                    [-38.6660100, 175.8656200],
-                    [-38.6646400, 175.8674900],
-                    [-38.6643350, 175.8687110]
-                ],
-                description: "Water taxi route between bays"
-            },
-            {
-                name: "Kinloch to Kawakawa Bay",
-                coordinates: [
-                    [-38.6636300, 175.9214300],
-                    [-38.6644900, 175.9190300],
-                    [-38.6663500, 175.9150600],
-                    [-38.6693600, 175.9085400],
-                    [-38.6745200, 175.8995200],
-                    [-38.6800200, 175.8892300],
-                    [-38.6817600, 175.8823600],
-                    [-38.6818900, 175.8766100],
-                    [-38.6810900, 175.8683700],
-                    [-38.6777400, 175.8639900],
-                    [-38.6705000, 175.8636500],
-                    [-38.6673300, 175.8652400],
-                    [-38.6652700, 175.8670600],
-                    [-38.6643350, 175.8687110]
-                ],
-                description: "Direct water taxi route to Kawakawa Bay"
-            }
-        ];
-        
-        // Water taxi pickup point at Kinloch Marina (updated location)
-        this.waterTaxiPickup = {
-            name: "Venture Beyond Water Taxi",
-            coordinates: [-38.6636300, 175.9214300],
-            description: "Water taxi services to western bays",
-            website: "https://www.venturebeyond.nz/",
-            services: [
-                "Kinloch to Waihora Bay: $85 per person",
-                "Kinloch to Kawakawa Bay: $65 per person", 
-                "Return trips available",
-                "Scenic waterfall tours",
-                "Great Lake Trails transport"
-            ],
-            operatingHours: "Daily departures - bookings essential",
-            contact: "Book online or call for availability"
-        };
+    applyFeatures(collection) {
+        // Group GeoJSON features back into the [lat, lon] structures the marker code expects
+        const layers = {};
+        collection.features.forEach(feature => {
+            const geometry = feature.geometry;
+            const coordinates = geometry.type === 'Point'
+                ? [geometry.coordinates[1], geometry.coordinates[0]]
+                : geometry.coordinates.map(point => [point[1], point[0]]);
+            const layer = feature.properties.layer;
+            (layers[layer] = layers[layer] || []).push({ ...feature.properties, coordinates: coordinates });
+        });
+
+        this.trails = layers.trail || [];
+        this.gpsImages = layers.gps_image || [];
+        this.pointsOfInterest = layers.poi || [];
+        this.trackDetails = layers.track_detail || [];
+        this.waterTaxiRoutes = layers.water_taxi_route || [];
+        this.waterTaxiPickup = (layers.water_taxi_pickup || [])[0] || null;
+
+        // Remove markers from the previous viewport before rebuilding
+        this.hideMapElements();
+
+        // Add water taxi routes to map
+        this.addWaterTaxiRoutesToMap();
+
+        // Add GPS images to map
+        this.addGPSImagesToMap();
+
+        // Add track details to map
+        this.addTrackDetailsToMap();
+
+        // Respect welcome mode if the markers are currently hidden
+        if (this.elementsHidden) {
+            this.hideMapElements();
+        } else {
+            this.showMapElements();
+        }
     }
 
     addTrailsToMap() {
@@ -1118,7 +314,11 @@ class KinlochMap {
             this.waterTaxiLayers.push(startDot);
         });
 
-        // Add water taxi pickup point (dark blue dot)
+        // Add water taxi pickup point (dark blue dot) when it falls inside the viewport
+        if (!this.waterTaxiPickup) {
+            return;
+        }
+
         const taxiMarker = L.circleMarker(this.waterTaxiPickup.coordinates, {
             radius: 10,
             fillColor: '#003366',
@@ -1454,12 +654,8 @@ class KinlochMap {
 
     async loadWeatherData() {
         try {
-            // Kinloch, Waikato coordinates
-            const lat = -38.6634;
-            const lon = 175.9200;
-            
-            // Fetch current weather and 7-day forecast from Open-Meteo API
-            const response = await fetch(`https://api.open-meteo.com/v1/forecast?latitude=${lat}&longitude=${lon}&current=temperature_2m,relative_humidity_2m,wind_speed_10m,wind_direction_10m,weather_code&daily=weather_code,temperature_2m_max,temperature_2m_min,precipitation_sum&timezone=Pacific/Auckland&forecast_days=7`);
+            // Fetch current weather and 7-day forecast for Kinloch via the server-side Open-Meteo cache
+            const response = await fetch('/api/weather');
             
             const data = await response.json();
             console.log('Weather data loaded:', data);
@@ -1688,6 +884,7 @@ class KinlochMap {
         const mapKey = document.querySelector('.map-key');
         const discoverBox = document.querySelector('.discover-kinloch-box');
         const weatherWidget = document.querySelector('.weather-widget');
+        this.elementsHidden = showWelcome;
         
         if (showWelcome) {
             // Welcome mode - show 20% more map (increased opacity from 0.3 to 0.5)
@@ -0,0 +1,54 @@
+// Loads page bundles declared as lazy in asset_manifest.py once their container scrolls into view
+(function() {
+    const bundles = window.LAZY_BUNDLES || {};
+
+    function loadStyle(href) {
+        const link = document.createElement('link');
+        link.rel = 'stylesheet';
+        link.href = href;
+        document.head.appendChild(link);
+    }
+
+    function loadScript(src) {
+        return new Promise((resolve, reject) => {
+            const script = document.createElement('script');
+            script.src = src;
+            script.onload = resolve;
+            script.onerror = () => reject(new Error('Failed to load ' + src));
+            document.body.appendChild(script);
+        });
+    }
+
+    async function loadBundle(name, bundle) {
+        bundle.styles.forEach(loadStyle);
+
+        // Scripts depend on each other (Leaflet before the map code), so load them in order
+        for (const src of bundle.scripts) {
+            await loadScript(src);
+        }
+
+        document.dispatchEvent(new CustomEvent('bundleloaded', { detail: { name: name } }));
+    }
+
+    Object.keys(bundles).forEach(name => {
+        const bundle = bundles[name];
+        const container = document.querySelector(bundle.container);
+        if (!container) {
+            return;
+        }
+
+        if (!('IntersectionObserver' in window)) {
+            loadBundle(name, bundle);
+            return;
+        }
+
+        const observer = new IntersectionObserver((entries) => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                observer.disconnect();
+                loadBundle(name, bundle).catch(error => console.error('Lazy bundle error:', error));
+            }
+        }, { rootMargin: '200px' });
+
+        observer.observe(container);
+    });
+})();
@@ -0,0 +1,23 @@
+// Page animation utilities
+function addPageAnimations() {
+    const observerOptions = {
+        threshold: 0.1,
+        rootMargin: '0px 0px -50px 0px'
+    };
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.classList.add('fade-in');
+            }
+        });
+    }, observerOptions);
+
+    // Observe all content cards
+    document.querySelectorAll('.content-card').forEach(card => {
+        observer.observe(card);
+    });
+}
+
+// Initialize animations
+document.addEventListener('DOMContentLoaded', addPageAnimations);
@@ -0,0 +1,43 @@
+import os
+
+from backup_system import BackupManager, PROJECT_FILES
+
+
+def write_project(root, text):
+    """Create every PROJECT_FILES entry under root with contents derived from text"""
+    for path in PROJECT_FILES:
+        full_path = root / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(f"{path}: {text}\n", encoding='utf-8')
+
+
+def test_archive_backup_round_trip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_project(tmp_path, 'first')
+    manager = BackupManager(storage_mode='archive')
+
+    assert manager.backup_project_files()
+
+    restored = manager.restore_project_snapshot()
+    assert restored['backup_type'] == 'full_project'
+    assert restored['files'] == {path: f"{path}: first\n" for path in PROJECT_FILES}
+
+    snapshots = manager.list_project_snapshots()
+    assert [snapshot['archive'] for snapshot in snapshots] == [True]
+    assert manager.restore_project_snapshot(snapshots[0]['timestamp']) == restored
+
+
+def test_restore_latest_prefers_newer_archive_over_stale_json(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_project(tmp_path, 'old')
+    assert BackupManager(storage_mode='full').backup_project_files()
+
+    # Switch to archive mode; the JSON latest file from before is left behind
+    write_project(tmp_path, 'new')
+    manager = BackupManager(storage_mode='archive')
+    assert manager.backup_project_files()
+    json_latest = os.path.join('backups', 'full_project_latest.json')
+    os.utime(json_latest, (0, 0))
+
+    restored = manager.restore_project_snapshot()
+    assert restored['files']['app.py'] == 'app.py: new\n'
@@ -0,0 +1,329 @@
+import http.client
+import math
+import os
+import queue
+import threading
+import urllib.parse
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines run a single process
+    fcntl = None
+
+DEFAULT_TILE_URL = 'https://tile.thunderforest.com/cycle/{z}/{x}/{y}.png'
+
+# Zoom range the site's map uses; the proxy refuses other zooms
+MIN_ZOOM = 10
+MAX_ZOOM = 18
+
+# Area around Kinloch covered by the discover map, as (west, south, east, north)
+KINLOCH_BBOX = (175.75, -38.72, 175.98, -38.62)
+
+# Eviction trims the cache to this fraction of max_bytes so it doesn't rescan on every store
+EVICT_LOW_WATER = 0.9
+
+
+class HTTPConnectionPool:
+    """Keeps persistent connections to a single upstream host so tile fetches reuse sockets"""
+
+    def __init__(self, base_url: str, size: int = 8, timeout: float = 10.0):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=size)
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        """Open a new connection to the upstream host"""
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def get(self, path: str) -> Tuple[int, bytes]:
+        """GET a path on the upstream host, returning (status, body)"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._new_connection()
+
+        for attempt in range(2):
+            try:
+                conn.request('GET', path, headers={'User-Agent': 'MatapouriBlue-TileCache/1.0'})
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if attempt:
+                    raise
+                # The pooled connection may have been closed by the server; retry once on a fresh one
+                conn = self._new_connection()
+
+        if response.will_close:
+            conn.close()
+        else:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        return response.status, body
+
+
+def lonlat_to_tile(lon: float, lat: float, zoom: int) -> Tuple[int, int]:
+    """Convert a coordinate to web-mercator tile x/y at the given zoom"""
+    n = 2 ** zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return max(0, min(n - 1, x)), max(0, min(n - 1, y))
+
+
+def tile_range(bbox: Tuple[float, float, float, float], zoom: int) -> Tuple[int, int, int, int]:
+    """(x_min, y_min, x_max, y_max) of the tiles covering bbox (west, south, east, north) at a zoom"""
+    west, south, east, north = bbox
+    x_min, y_min = lonlat_to_tile(west, north, zoom)
+    x_max, y_max = lonlat_to_tile(east, south, zoom)
+    return x_min, y_min, x_max, y_max
+
+
+def in_service_area(z: int, x: int, y: int) -> bool:
+    """True for tiles the site's map can request: MIN_ZOOM-MAX_ZOOM and touching KINLOCH_BBOX"""
+    if not MIN_ZOOM <= z <= MAX_ZOOM:
+        return False
+    x_min, y_min, x_max, y_max = tile_range(KINLOCH_BBOX, z)
+    return x_min <= x <= x_max and y_min <= y <= y_max
+
+
+class TileCache:
+    """Size-bounded on-disk LRU cache in front of the Thunderforest tile server.
+
+    The cache directory is shared by every gunicorn worker and the prewarm CLI: tiles
+    written by another process are picked up from disk, and the size bound is enforced
+    on a byte count kept in the directory under an flock.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                 tile_url: Optional[str] = None, api_key: Optional[str] = None):
+        self.cache_dir = cache_dir or os.environ.get('TILE_CACHE_DIR', 'tile_cache')
+        self.max_bytes = max_bytes or int(os.environ.get('TILE_CACHE_MAX_MB', '200')) * 1024 * 1024
+        self.tile_url = tile_url or os.environ.get('THUNDERFOREST_TILE_URL', DEFAULT_TILE_URL)
+        self.api_key = api_key if api_key is not None else os.environ.get('THUNDERFOREST_API_KEY')
+        self.pool = HTTPConnectionPool(self.tile_url)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._loaded = False
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'upstream_errors': 0}
+
+    def _tile_path(self, z: int, x: int, y: int) -> str:
+        """Location of a cached tile on disk"""
+        return os.path.join(self.cache_dir, str(z), str(x), f"{y}.png")
+
+    @contextmanager
+    def _disk_lock(self):
+        """Exclusive lock shared with other processes using the same cache directory"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, '.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _scan_disk(self) -> List[Tuple[str, int]]:
+        """Every cached tile as (path, size), least recently used first"""
+        found = []
+        if os.path.exists(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith('.png'):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    found.append((max(st.st_atime, st.st_mtime), path, st.st_size))
+        return [(path, size) for _, path, size in sorted(found)]
+
+    def _usage_path(self) -> str:
+        return os.path.join(self.cache_dir, '.usage')
+
+    def _read_usage(self) -> int:
+        """Bytes on disk according to the shared counter (call under _disk_lock)"""
+        try:
+            with open(self._usage_path(), 'r') as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return sum(size for _, size in self._scan_disk())
+
+    def _write_usage(self, total: int):
+        with open(self._usage_path(), 'w') as f:
+            f.write(str(max(0, total)))
+
+    def _evict_from_disk(self) -> Set[str]:
+        """Delete least recently used tiles until under the low-water mark (call under _disk_lock)"""
+        tiles = self._scan_disk()
+        total = sum(size for _, size in tiles)
+        target = self.max_bytes * EVICT_LOW_WATER if total > self.max_bytes else total
+        evicted = set()
+        for path, size in tiles:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            evicted.add(path)
+        self._write_usage(total)
+        return evicted
+
+    def _forget(self, paths: Set[str]):
+        """Drop evicted tiles from the in-memory index"""
+        if not paths:
+            return
+        with self._lock:
+            for path in paths:
+                self._entries.pop(path, None)
+            self.stats['evictions'] += len(paths)
+
+    def _load_index(self):
+        """Scan the cache directory once, resyncing the shared byte count and enforcing the bound"""
+        if self._loaded:
+            return
+        with self._disk_lock():
+            tiles = self._scan_disk()
+            total = sum(size for _, size in tiles)
+            self._write_usage(total)
+            evicted = self._evict_from_disk() if total > self.max_bytes else set()
+        for path, size in tiles:
+            if path not in evicted:
+                self._entries[path] = size
+        self.stats['evictions'] += len(evicted)
+        self._loaded = True
+
+    def _upstream_path(self, z: int, x: int, y: int) -> str:
+        """Request path (with API key) for a tile on the upstream host"""
+        parsed = urllib.parse.urlsplit(self.tile_url.format(z=z, x=x, y=y))
+        query = parsed.query
+        if self.api_key:
+            query = f"{query}&apikey={self.api_key}" if query else f"apikey={self.api_key}"
+        return f"{parsed.path}?{query}" if query else parsed.path
+
+    def _store(self, path: str, data: bytes):
+        """Write a tile atomically and account for it in the shared size bound"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+
+        with self._disk_lock():
+            try:
+                old_size = os.stat(path).st_size
+            except OSError:
+                old_size = 0
+            os.replace(tmp_path, path)
+            total = self._read_usage() + len(data) - old_size
+            self._write_usage(total)
+            evicted = self._evict_from_disk() if total > self.max_bytes else set()
+
+        with self._lock:
+            self._entries.pop(path, None)
+            self._entries[path] = len(data)
+        self._forget(evicted)
+
+    def _read_cached(self, path: str) -> Optional[bytes]:
+        """Tile bytes from disk, marking it recently used; None if it isn't cached (any more)"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            # Recency is kept on disk so every process's eviction sees it
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def get_tile(self, z: int, x: int, y: int) -> Tuple[Optional[bytes], str]:
+        """Return (png_bytes, 'HIT'|'MISS') for a tile, or (None, reason) if it cannot be fetched"""
+        path = self._tile_path(z, x, y)
+
+        with self._lock:
+            self._load_index()
+
+        # Check the disk even when the tile isn't indexed: another worker or the prewarm CLI may have written it
+        data = self._read_cached(path)
+        with self._lock:
+            if data is not None:
+                self._entries.pop(path, None)
+                self._entries[path] = len(data)
+                self.stats['hits'] += 1
+                return data, 'HIT'
+            self._entries.pop(path, None)
+            self.stats['misses'] += 1
+
+        try:
+            status, data = self.pool.get(self._upstream_path(z, x, y))
+        except Exception as e:
+            print(f"Tile upstream error: {e}")
+            with self._lock:
+                self.stats['upstream_errors'] += 1
+            return None, 'upstream unavailable'
+
+        if status != 200:
+            with self._lock:
+                self.stats['upstream_errors'] += 1
+            return None, f'upstream returned {status}'
+
+        self._store(path, data)
+        return data, 'MISS'
+
+    def prewarm(self, min_zoom: int, max_zoom: int,
+                bbox: Tuple[float, float, float, float] = KINLOCH_BBOX) -> Dict[str, int]:
+        """Fetch every tile in a zoom range covering bbox (west, south, east, north)"""
+        fetched = 0
+        failed = 0
+        for z in range(min_zoom, max_zoom + 1):
+            x_min, y_min, x_max, y_max = tile_range(bbox, z)
+            for x in range(x_min, x_max + 1):
+                for y in range(y_min, y_max + 1):
+                    data, _ = self.get_tile(z, x, y)
+                    if data is None:
+                        failed += 1
+                    else:
+                        fetched += 1
+        return {'tiles': fetched, 'failed': failed}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters plus current size on disk"""
+        with self._lock:
+            self._load_index()
+            stats = dict(self.stats, tiles=len(self._entries), max_bytes=self.max_bytes)
+        with self._disk_lock():
+            stats['bytes'] = self._read_usage()
+        return stats
+
+# Global tile cache instance
+tile_cache = TileCache()
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pre-warm the map tile cache')
+    parser.add_argument('--min-zoom', type=int, default=12)
+    parser.add_argument('--max-zoom', type=int, default=15)
+    parser.add_argument('--bbox', default=','.join(str(v) for v in KINLOCH_BBOX),
+                        help='west,south,east,north')
+    args = parser.parse_args()
+
+    result = tile_cache.prewarm(args.min_zoom, args.max_zoom,
+                                tuple(float(v) for v in args.bbox.split(',')))
+    print(f"Pre-warmed {result['tiles']} tiles ({result['failed']} failed)")
@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Dict, Any, Optional, Tuple
+
+# Kinloch, Waikato coordinates used by the map weather widget
+KINLOCH_LAT = -38.6634
+KINLOCH_LON = 175.9200
+
+DEFAULT_UPSTREAM_URL = 'https://api.open-meteo.com/v1/forecast'
+
+FORECAST_PARAMS = {
+    'latitude': KINLOCH_LAT,
+    'longitude': KINLOCH_LON,
+    'current': 'temperature_2m,relative_humidity_2m,wind_speed_10m,wind_direction_10m,weather_code',
+    'daily': 'weather_code,temperature_2m_max,temperature_2m_min,precipitation_sum',
+    'timezone': 'Pacific/Auckland',
+    'forecast_days': 7,
+}
+
+
+class WeatherProxy:
+    """Caches the Open-Meteo forecast for Kinloch, coalescing concurrent misses into one upstream request"""
+
+    def __init__(self, upstream_url: Optional[str] = None, ttl: int = 600,
+                 stale_ttl: int = 3600, timeout: float = 5.0):
+        self.upstream_url = upstream_url or os.environ.get('OPEN_METEO_URL', DEFAULT_UPSTREAM_URL)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._body = None
+        self._fetched_at = 0.0
+        self._inflight = None
+        self._last_error = None
+        self.stats = {'hits': 0, 'stale': 0, 'misses': 0, 'upstream_requests': 0, 'upstream_errors': 0}
+
+    def _fetch_upstream(self) -> bytes:
+        """Request the forecast from Open-Meteo and validate it is JSON"""
+        url = f"{self.upstream_url}?{urllib.parse.urlencode(FORECAST_PARAMS)}"
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            body = response.read()
+        json.loads(body)
+        return body
+
+    def _refresh(self, event: threading.Event):
+        """Fetch upstream once and publish the result to every waiting request"""
+        with self._lock:
+            self.stats['upstream_requests'] += 1
+        try:
+            body = self._fetch_upstream()
+            with self._lock:
+                self._body = body
+                self._fetched_at = time.monotonic()
+                self._last_error = None
+        except Exception as e:
+            print(f"Weather upstream error: {e}")
+            with self._lock:
+                self.stats['upstream_errors'] += 1
+                self._last_error = str(e)
+        finally:
+            with self._lock:
+                self._inflight = None
+            event.set()
+
+    def _start_refresh(self) -> Tuple[threading.Event, bool]:
+        """Return (event, is_leader); must be called with the lock held"""
+        if self._inflight is not None:
+            return self._inflight, False
+        self._inflight = threading.Event()
+        return self._inflight, True
+
+    def get_forecast(self) -> Dict[str, Any]:
+        """Return {'body', 'age', 'cache'} for the current forecast, fetching upstream at most once per TTL"""
+        with self._lock:
+            age = time.monotonic() - self._fetched_at
+            if self._body is not None and age < self.ttl:
+                self.stats['hits'] += 1
+                return {'body': self._body, 'age': age, 'cache': 'HIT'}
+
+            if self._body is not None and age < self.ttl + self.stale_ttl:
+                # Serve stale data immediately and revalidate in the background
+                self.stats['stale'] += 1
+                event, is_leader = self._start_refresh()
+                if is_leader:
+                    threading.Thread(target=self._refresh, args=(event,), daemon=True).start()
+                return {'body': self._body, 'age': age, 'cache': 'STALE'}
+
+            self.stats['misses'] += 1
+            event, is_leader = self._start_refresh()
+
+        if is_leader:
+            self._refresh(event)
+        else:
+            event.wait(self.timeout + 1)
+
+        with self._lock:
+            if self._body is not None:
+                # Fall back to whatever we have if the upstream is failing
+                age = time.monotonic() - self._fetched_at
+                return {'body': self._body, 'age': age, 'cache': 'MISS' if age < self.ttl else 'STALE'}
+            raise RuntimeError(self._last_error or 'Weather upstream unavailable')
+
+# Global weather proxy instance
+weather_proxy = WeatherProxy()